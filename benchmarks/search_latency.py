@@ -0,0 +1,68 @@
+"""
+Query latency of the title search as the corpus grows.
+
+Compares the original path (refit TfidfVectorizer, dense cosine_similarity,
+full argsort) with the prebuilt SearchIndex and its top-k selection, on
+synthetic titles drawn from a Zipf-distributed vocabulary.
+
+Run from the repository root:
+
+    python -m benchmarks.search_latency
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from search.index import SearchIndex
+
+CORPUS_SIZES = [10_000, 50_000, 100_000, 200_000, 400_000]
+QUERIES = ["neural network", "graph learning", "robot control policy", "language model evaluation"]
+REFIT_MAX_SIZE = 100_000  # refitting beyond this takes too long to be worth waiting for
+TOP_K = 100
+REPEAT = 5
+
+
+def synthetic_titles(n_docs, rng):
+    words = ["neural", "network", "graph", "learning", "robot", "control", "policy", "language",
+             "model", "evaluation", "deep", "reinforcement", "vision", "causal", "inference"]
+    words += [f"term{i}" for i in range(20_000)]
+    ranks = np.minimum(rng.zipf(1.3, size=(n_docs, 8)), len(words)) - 1
+    return pd.Series([" ".join(words[r] for r in row) for row in ranks])
+
+
+def refit_search(query, titles):
+    vectorizer = TfidfVectorizer(stop_words='english')
+    vectors = vectorizer.fit_transform(titles)
+    scores = cosine_similarity(vectorizer.transform([query]), vectors).flatten()
+    order = scores.argsort()[::-1]
+    return order[scores[order] > 0.1]
+
+
+def median_ms(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return 1000 * float(np.median(timings))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'docs':>8} {'refit':>10} {'index':>10} {f'top-{TOP_K}':>10}")
+    for n_docs in CORPUS_SIZES:
+        titles = synthetic_titles(n_docs, rng)
+        index = SearchIndex.build(titles, "bench")
+        refit = "-"
+        if n_docs <= REFIT_MAX_SIZE:
+            refit = f"{median_ms(lambda: [refit_search(q, titles) for q in QUERIES]) / len(QUERIES):.1f}"
+        full = median_ms(lambda: [index.search(q) for q in QUERIES]) / len(QUERIES)
+        top = median_ms(lambda: [index.search(q, top_k=TOP_K) for q in QUERIES]) / len(QUERIES)
+        print(f"{n_docs:>8} {refit:>10} {full:>10.2f} {top:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
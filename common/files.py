@@ -0,0 +1,75 @@
+"""
+Atomic file replacement and an inter-process lock, for files that several
+processes (Streamlit workers, concurrent crawls) read and rebuild.
+
+Writers get a unique temporary file in the directory of the target and
+move it over the target only once it is complete, so readers see either
+the old file or the new one, never a partial one, and concurrent writers
+never share a temporary file.
+"""
+import contextlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def atomic_path(file_path: str):
+    """
+    Yields a unique temporary path next to file_path, and replaces file_path
+    with it when the block completes. The temporary file is removed if the
+    block raises.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def atomic_write(file_path: str, mode: str = 'w', **open_kwargs):
+    """Opens a temporary file like open() and replaces file_path with it when the block completes"""
+    with atomic_path(file_path) as tmp_path:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            yield f
+
+
+@contextlib.contextmanager
+def file_lock(lock_path: str):
+    """
+    Holds an exclusive lock on lock_path for the duration of the block,
+    waiting for other processes and threads holding it to release it.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # Gives up after about 10 seconds, so keep waiting
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
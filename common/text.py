@@ -0,0 +1,6 @@
+import re
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Lower-cases a keyword and collapses whitespace; the search analyzer ignores both"""
+    return re.sub(r'\s+', ' ', (keyword or '').strip().lower())
@@ -1,62 +1,57 @@
 import streamlit as st
-import pandas as pd
 import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 
-# Function to load CSV data
-@st.cache_data
+from search.cache import QueryCache, normalize_query
+from search.core import filter_rows
+from search.export import EXPORT_FORMATS, read_export
+from search.facets import FacetIndex
+from search.index import SearchIndex
+from search.render import page_positions, render_page_html, total_pages
+from search.store import load_corpus
+
+# Function to memory-map the columnar corpus store, building it from the CSV when it is missing or stale
+@st.cache_resource
 def load_data(file_path):
-    df = pd.read_csv(file_path)
-    df['publication_date'] = pd.to_datetime(df['publication_date'], format='mixed')
-    df.fillna('N/A', inplace=True)
-    return df
-
-# Function to convert DataFrame to CSV
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Function to create a hyperlink for the title
-def make_clickable(title, link):
-    if pd.notna(link):
-        return f'<a href="{link}" target="_blank">{title}</a>'
-    return title  # Return just the title if link is not available
-
-# Function to find similar entries using cosine similarity for any column (titles/authors)
-def find_similar_entries(query, column_data):
-    # Create TF-IDF vectors for the column data (either titles or author names)
-    vectorizer = TfidfVectorizer(stop_words='english')
-    column_vectors = vectorizer.fit_transform(column_data)
-    
-    # Vectorize the query
-    query_vector = vectorizer.transform([query])
-    
-    # Compute cosine similarities
-    cosine_similarities = cosine_similarity(query_vector, column_vectors).flatten()
-    
-    # Get indices of entries with highest similarity scores
-    similar_indices = cosine_similarities.argsort()[::-1]  # Sort in descending order of similarity
-    
-    # Get similar entries (use a threshold to filter out low similarity)
-    similar_entries = [column_data.iloc[i] for i in similar_indices if cosine_similarities[i] > 0.1]
-    
-    return similar_entries
-
-# Pagination function
-def paginate_data(data, page, page_size):
-    return data.iloc[page * page_size:(page + 1) * page_size]
+    return load_corpus(file_path, corpus_store_dir, drop_sources=['dblp'])
+
+# Function to export result rows from the typed corpus columns; only called when a download button is clicked
+def export_bytes(positions, fmt):
+    return read_export(data, corpus_version, positions, fmt, export_dir)
+
+# Function to load the prebuilt search index for a column, building it once per corpus version
+@st.cache_resource
+def load_search_index(corpus_version, column, _column_data):
+    return SearchIndex.load_or_build(search_index_dir, column, corpus_version, _column_data)
+
+# Function to get the search result cache shared by all sessions of this process
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(max_entries=256, ttl_seconds=3600)
+
+# Function to build the bitmap index of a facet column once per corpus version
+@st.cache_resource
+def load_facet_index(corpus_version, column, _column_data):
+    return FacetIndex(column, _column_data)
 
 # Streamlit app interface
 st.sidebar.title("Enter Search Parameters")
 
 # Specify the path to your CSV file
 csv_file_path = "val.csv"
+corpus_store_dir = "corpus_store"
+search_index_dir = "search_index"
+export_dir = "exports"
+
+# Load data (dblp rows are dropped when the store is built). The frame is shared by all sessions, so never modify it in place
+data, corpus_version = load_data(csv_file_path)
 
-# Load data
-data = load_data(csv_file_path)
-data = data[data['data_source'] != 'dblp']
-data['title'] = data['title'].astype(str)
+# Load the search indexes for titles and author names
+title_index = load_search_index(corpus_version, 'title', data['title'])
+author_index = load_search_index(corpus_version, 'full_name', data['full_name'])
+
+# Load the bitmap indexes for the source and type checkboxes
+source_facet = load_facet_index(corpus_version, 'data_source', data['data_source'])
+type_facet = load_facet_index(corpus_version, 'type', data['type'])
 
 # Get min and max dates from the dataframe
 min_date = data['publication_date'].min().date()
@@ -89,15 +84,28 @@ with col2:
 title_keyword = st.sidebar.text_input("Enter a keyword to search in titles:")
 author_keyword = st.sidebar.text_input("Enter a keyword to search in author names:")
 
+# Function to draw a checkbox per facet value, with a slot next to it for the number of hits it would give
+def facet_checkboxes(facet, key_prefix, count_slots):
+    selected = []
+    for value in facet.values:
+        if not value.strip():
+            continue
+        col1, col2 = st.sidebar.columns([4, 1])
+        with col1:
+            if st.checkbox(value, key=f'{key_prefix}_{value}'):
+                selected.append(value)
+        count_slots[(facet.name, value)] = col2.empty()
+    return selected
+
+facet_count_slots = {}
+
 # Checkboxes for data sources
 st.sidebar.write("Select Source(s):")
-data_sources = [source.strip() for source in data['data_source'].unique().tolist() if source.strip()]
-selected_sources = [source for source in data_sources if st.sidebar.checkbox(source, key=f'source_{source}')]
+selected_sources = facet_checkboxes(source_facet, 'source', facet_count_slots)
 
 # Checkboxes for types
 st.sidebar.write("Select Type(s):")
-unique_types = [t.strip() for t in data['type'].dropna().unique().tolist() if t.strip()]
-selected_types_checkboxes = [t for t in unique_types if st.sidebar.checkbox(t, key=f'type_{t}')]
+selected_types_checkboxes = facet_checkboxes(type_facet, 'type', facet_count_slots)
 
 # Initialize session state variables
 if 'page' not in st.session_state:
@@ -106,62 +114,56 @@ if 'page' not in st.session_state:
 # Search button
 if st.sidebar.button("Search"):
     with st.spinner('Filtering data...'):
-        # Ensure publication_date is in datetime format
-        data['publication_date'] = pd.to_datetime(data['publication_date'], errors='coerce')
-        
-        # Perform filtering
-        mask = (data['publication_date'] >= pd.Timestamp(start_date)) & (data['publication_date'] <= pd.Timestamp(end_date))
-        
-        # Apply search using similarity for both title and author
-        if title_keyword:
-            # Find similar titles using cosine similarity
-            similar_titles = find_similar_entries(title_keyword, data['title'])
-            mask &= data['title'].isin(similar_titles)
-
-        if author_keyword:
-            # Find similar authors using cosine similarity
-            similar_authors = find_similar_entries(author_keyword, data['full_name'].astype(str))
-            mask &= data['full_name'].isin(similar_authors)
-
-        if selected_sources:
-            mask &= data['data_source'].isin(selected_sources)
-
-        if selected_types_checkboxes:
-            mask &= data['type'].isin(selected_types_checkboxes)
-
-        filtered_data = data[mask]
-
-        # Store results in session state
-        st.session_state['filtered_data'] = filtered_data
+        # Perform filtering on row positions, so rows sharing a title or author name are not pulled in.
+        # Repeated searches are served from the result cache
+        query_cache = get_query_cache()
+        query_key = normalize_query(
+            start_date, end_date,
+            keywords={'title': title_keyword, 'full_name': author_keyword},
+            facets={'data_source': selected_sources, 'type': selected_types_checkboxes},
+        )
+        result = query_cache.get_or_compute(corpus_version, query_key, lambda: filter_rows(
+            data, start_date, end_date,
+            keyword_searches=[(title_index, title_keyword), (author_index, author_keyword)],
+            facets=[(source_facet, selected_sources), (type_facet, selected_types_checkboxes)],
+        ))
+
+        # Store only the row positions in session state; pages are formatted when shown
+        st.session_state['positions'] = result.positions
+        st.session_state['corpus_version'] = corpus_version
+        st.session_state['facet_counts'] = result.facet_counts
         st.session_state['page'] = 0  # Reset to the first page
 
-# Display title
-st.markdown("<h1 style='text-align: center;'>Filtered Results</h1>", unsafe_allow_html=True)
+# Hit and miss counters of the result cache shared by all sessions
+with st.sidebar.expander("Result cache"):
+    cache_stats = get_query_cache().stats()
+    st.caption(f"{cache_stats['hits']} hits, {cache_stats['misses']} misses "
+               f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} cached searches")
 
-# Display filtered data
-if 'filtered_data' in st.session_state:
-    filtered_data = st.session_state['filtered_data'].copy()
+# Show the hit counts of the current result set next to the checkboxes (the whole corpus before the first search)
+facet_counts = st.session_state.get('facet_counts') or {
+    source_facet.name: source_facet.counts(),
+    type_facet.name: type_facet.counts(),
+}
+for (facet_name, value), slot in facet_count_slots.items():
+    slot.caption(str(facet_counts[facet_name].get(value, 0)))
 
-    # Make title column clickable using the link
-    filtered_data['title'] = filtered_data.apply(lambda x: make_clickable(x['title'], x['link']), axis=1)
-
-    # Clean up special characters in the DataFrame
-    filtered_data.replace({r'\n': ' ', r'\r': ' '}, regex=True, inplace=True)
+# Display title
+st.markdown("<h1 style='text-align: center;'>Filtered Results</h1>", unsafe_allow_html=True)
 
-    filtered_data = filtered_data.astype(str)
+# Display filtered data (positions from before a corpus rebuild no longer point at the same rows)
+if 'positions' in st.session_state and st.session_state.get('corpus_version') == corpus_version:
+    positions = st.session_state['positions']
 
     # Pagination controls
     page_size = 100
-    total_pages = (len(filtered_data) + page_size - 1) // page_size  # Compute total pages
+    n_pages = total_pages(len(positions), page_size)
     page = st.session_state['page']
 
-    paginated_data = paginate_data(filtered_data, page, page_size)
-
-    # Remove the 'link' column
-    paginated_data = paginated_data.drop(columns=['link'])
+    visible_positions = page_positions(positions, page, page_size)
 
-    # Convert the DataFrame to HTML and style it
-    filtered_data_html = paginated_data[["full_name", "title", "publication_date", "data_source"]].to_html(index=False, escape=False)
+    # Format only the visible page: clickable titles, newline cleanup and HTML
+    filtered_data_html = render_page_html(data, visible_positions, ["full_name", "title", "publication_date", "data_source"])
 
     # Apply CSS to prioritize width for 'title' and 'full_name' columns and limit row height
     st.markdown("""
@@ -194,22 +196,21 @@ if 'filtered_data' in st.session_state:
     st.markdown(filtered_data_html, unsafe_allow_html=True)
 
     # Display number of results on the current page and total number of filtered results
-    current_page_results = len(paginated_data)
-    total_results = len(filtered_data)
+    current_page_results = len(visible_positions)
+    total_results = len(positions)
     start_idx = page * page_size + 1
     end_idx = start_idx + current_page_results - 1
     st.subheader(f"Showing {start_idx}-{end_idx} of {total_results} results")
 
-    # Convert filtered data to CSV
-    csv = convert_df_to_csv(filtered_data)
-
-    # Download button on the sidebar
-    st.sidebar.download_button(
-        label="Download data as CSV",
-        data=csv,
-        file_name='filtered_data.csv',
-        mime='text/csv',
-    )
+    # Download buttons on the sidebar; the export is written (or read from the export cache) on click, not on every rerun
+    for fmt, (extension, mime, label) in EXPORT_FORMATS.items():
+        st.sidebar.download_button(
+            label=f"Download data as {label}",
+            data=lambda fmt=fmt: export_bytes(positions, fmt),
+            file_name=f'filtered_data.{extension}',
+            mime=mime,
+            on_click='ignore',
+        )
 
     # Pagination controls
     col1, col2 = st.columns([1, 1])
@@ -220,7 +221,7 @@ if 'filtered_data' in st.session_state:
                 st.rerun()
     with col2:
         if st.button("Next"):
-            if st.session_state['page'] < total_pages - 1:
+            if st.session_state['page'] < n_pages - 1:
                 st.session_state['page'] += 1
                 st.rerun()
 
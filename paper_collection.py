@@ -1,20 +1,21 @@
 import pandas as pd
-import requests
-import requests
-import json
-import time
 import os
-import pandas as pd
-import os
-import json
+
+from scrapers.checkpoint import JsonlCheckpoint
+from scrapers.fetch import FetchEngine
+from scrapers.http_cache import ResponseCache
+from scrapers.paper_ids import canonical_paper_ids, semantic_scholar_ids, unique_papers_mask
+from scrapers.paper_joins import join_paper_tables
+from scrapers.paper_tables import build_paper_tables
 
 
 
 
 df = pd.read_csv("new_sem_sch_collection.csv")
 #df = df[0:50]
-df = df.drop_duplicates(subset='link')
-df = df.drop_duplicates(subset='title')
+# One row per paper: same canonical ID (or link), then same title
+df['canonical_id'] = canonical_paper_ids(df['link'])
+df = df[unique_papers_mask(df)]
 
 
 
@@ -22,156 +23,86 @@ sdf = df[df['data_source'] == 'Semantic Scholar']
 #for idx, row in sdf.iterrows():
 #   print(row['link'].split('/')[-1])
 
-paper_ss_list = list(set([row['link'].split('/')[-1] for idx, row in sdf.iterrows()]))
+# Sorted, so the fetch order is the same on every run
+paper_ss_list = sorted(set(semantic_scholar_ids(sdf['link']).dropna()))
 len(paper_ss_list)
 
-def fetch_paper_data(paper_ss_list, start_index=0):
-    json_responses = load_progress('paper_data.json')[0]  # Load existing responses
-    for idx in range(start_index, len(paper_ss_list)):
-        value = paper_ss_list[idx]
-        base_url = f'https://recommendpapers.xyz/api/lookup_paper?id={value}&fields=title,authors,citationCount,externalIds'
-        while True:
-            try:
-                response = requests.get(base_url)
-                response.raise_for_status()
-                json_data = response.json()
-                json_responses.append(json_data)
-                print(f"Processed {idx}: {base_url}")
-                store_json_responses(json_responses, 'paper_data.json') 
-                time.sleep(1)# Save after each successful fetch
-                break
-            except requests.ConnectionError:
-                print('Connection error, pausing for 30 minutes...')
-                time.sleep(1800)
-            except requests.HTTPError as e:
-                print(f"HTTP error occurred: {e}")
-                break
-            except KeyboardInterrupt:
-                print('Process interrupted by user.')
-                return json_responses, idx
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}")
-                break
-    return json_responses, len(paper_ss_list)
-
-def store_json_responses(json_responses, filename):
-    with open(filename, 'w') as f:
-        json.dump(json_responses, f, indent=2)
-    print(f"Data saved to {filename}")
-
-def load_progress(filename):
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        return data, len(data)
-    return [], 0
+# Semantic Scholar batch lookup; unknown IDs come back as null
+paper_batch_url = 'https://api.semanticscholar.org/graph/v1/paper/batch'
+paper_fields = 'title,authors,citationCount,externalIds'
+paper_batch_size = 500  # the API rejects larger paper batches
+
+# Concurrent requests within the API rate limit, with backoff on 429/5xx and connection errors.
+# Batch responses are cached on disk for a week, so reruns do not download them again
+fetch_engine = FetchEngine(
+    workers=4,
+    rate_limits={'api.semanticscholar.org': 1.0},
+    cache=ResponseCache('http_cache', ttl_seconds={paper_batch_url: 7 * 24 * 3600})
+)
+
+def fetch_paper_batch(paper_ids):
+    headers = {}
+    if os.environ.get('S2_API_KEY'):
+        headers['x-api-key'] = os.environ['S2_API_KEY']
+    response = fetch_engine.post(paper_batch_url, params={'fields': paper_fields}, json={'ids': paper_ids}, headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_paper_data(paper_ss_list, checkpoint, batch_size=paper_batch_size):
+    # Resume from the IDs already in the checkpoint rather than from a position in the list
+    completed_ids = checkpoint.completed_ids()
+    pending = [value for value in paper_ss_list if value not in completed_ids]
+    print(f"{len(completed_ids)} papers already fetched, {len(pending)} remaining")
+    chunks = [tuple(pending[i:i + batch_size]) for i in range(0, len(pending), batch_size)]
+    processed = 0
+    try:
+        while chunks:
+            rejected_chunks = []
+            for chunk, papers, error in fetch_engine.map(lambda chunk: fetch_paper_batch(list(chunk)), chunks):
+                if error is not None:
+                    response = getattr(error, 'response', None)
+                    if response is not None and response.status_code == 400 and len(chunk) > 1:
+                        # Split a rejected chunk, so one malformed ID does not block the rest
+                        middle = len(chunk) // 2
+                        rejected_chunks.extend([chunk[:middle], chunk[middle:]])
+                    else:
+                        print(f"Skipping {len(chunk)} papers, they will be retried on the next run: {error}")
+                    continue
+                # Save the chunk: one line per requested ID, in the same shape as the single-paper lookup
+                for value, paper in zip(chunk, papers):
+                    checkpoint.append(value, {'papers': [paper] if paper else []})
+                checkpoint.sync()
+                processed += len(chunk)
+                print(f"Processed {processed}/{len(pending)} papers")
+            chunks = rejected_chunks
+    except KeyboardInterrupt:
+        print('Process interrupted by user.')
+    print(f"Fetch stats: {fetch_engine.stats.snapshot()}")
+    return processed
 
 # Usage
 #paper_ss_list = ['paper_id_1', 'paper_id_2', 'paper_id_3']  # Replace with actual IDs
-progress, start_index = load_progress('paper_data.json')
-results, next_index = fetch_paper_data(paper_ss_list, start_index=start_index)
-
-print(f"Processed {next_index} out of {len(paper_ss_list)} papers")
-print(results)
-
+with JsonlCheckpoint('paper_data.jsonl') as checkpoint:
+    processed = fetch_paper_data(paper_ss_list, checkpoint)
 
+print(f"Processed {processed} new papers, {len(checkpoint.completed_ids())} out of {len(paper_ss_list)} done")
 
 
-# Open and read the JSON file
-with open('paper_data.json', 'r') as file:
-    data = json.load(file)
 
-# Print the data
-print(data)
 
+# Normalize the fetched responses into the Papers, Authors, PaperAuthors and ExternalIds tables
+# and save them to CSV files; incremental=True only adds the responses fetched since the last run
+output_dir = "output_csv"
+table_paths = build_paper_tables(JsonlCheckpoint('paper_data.jsonl'), output_dir, incremental=False)
+papers_df = pd.read_csv(table_paths["Papers"], dtype=str)
+authors_df = pd.read_csv(table_paths["Authors"], dtype=str)
+paper_authors_df = pd.read_csv(table_paths["PaperAuthors"], dtype=str)
+external_ids_df = pd.read_csv(table_paths["ExternalIds"], dtype=str)
 
 
 
-# Create output directory
-output_dir = "output_csv"
-os.makedirs(output_dir, exist_ok=True)
-
-# DataFrames to store extracted data
-papers_df = pd.DataFrame(columns=["paperId", "title", "citationCount"])
-authors_df = pd.DataFrame(columns=["authorId", "name"])
-paper_authors_df = pd.DataFrame(columns=["paperId", "authorId"])
-external_ids_df = pd.DataFrame(columns=["paperId", "DBLP", "ArXiv", "DOI", "CorpusId", "MAG", "PubMed", "PubMedCentral", "ACL"])
-
-# Process data and populate DataFrames
-for responses_item in data:
-    papers = responses_item.get('papers', [])
-
-    if isinstance(papers, list):
-        for paper in papers:
-            if isinstance(paper, dict):
-                # Extract paper information
-                paper_id = paper.get('paperId')
-                title = paper.get('title')
-                citation_count = paper.get('citationCount')
-
-                # Append to papers_df
-                papers_df = pd.concat([papers_df, pd.DataFrame([{
-                    "paperId": paper_id,
-                    "title": title,
-                    "citationCount": citation_count
-                }])], ignore_index=True)
-
-                # Extract external IDs
-                external_ids = paper.get('externalIds', {})
-                external_ids_df = pd.concat([external_ids_df, pd.DataFrame([{
-                    "paperId": paper_id,
-                    "DBLP": external_ids.get('DBLP'),
-                    "ArXiv": external_ids.get('ArXiv'),
-                    "DOI": external_ids.get('DOI'),
-                    "CorpusId": external_ids.get('CorpusId'),
-                    "MAG": external_ids.get('MAG'),
-                    "PubMed": external_ids.get('PubMed'),
-                    "PubMedCentral": external_ids.get('PubMedCentral'),
-                    "ACL": external_ids.get('ACL')
-                }])], ignore_index=True)
-
-                # Process authors
-                authors = paper.get('authors', [])
-                if isinstance(authors, list):
-                    for author in authors:
-                        if isinstance(author, dict):
-                            author_id = author.get('authorId')
-                            author_name = author.get('name')
-
-                            # Append to authors_df
-                            if author_id is not None:
-                                authors_df = pd.concat([authors_df, pd.DataFrame([{
-                                    "authorId": author_id,
-                                    "name": author_name
-                                }])], ignore_index=True)
-
-                                # Append to paper_authors_df
-                                paper_authors_df = pd.concat([paper_authors_df, pd.DataFrame([{
-                                    "paperId": paper_id,
-                                    "authorId": author_id
-                                }])], ignore_index=True)
-
-# Remove duplicates in DataFrames
-papers_df = papers_df.drop_duplicates()
-authors_df = authors_df.drop_duplicates()
-paper_authors_df = paper_authors_df.drop_duplicates()
-external_ids_df = external_ids_df.drop_duplicates()
-
-# Save DataFrames to CSV files
-papers_df.to_csv(os.path.join(output_dir, "Papers.csv"), index=False)
-authors_df.to_csv(os.path.join(output_dir, "Authors.csv"), index=False)
-paper_authors_df.to_csv(os.path.join(output_dir, "PaperAuthors.csv"), index=False)
-external_ids_df.to_csv(os.path.join(output_dir, "ExternalIds.csv"), index=False)
-
-
-
-papers_with_ids = papers_df.merge(external_ids_df, on="paperId", how="left")
-
-# Join PaperAuthors to Authors (INNER JOIN)
-paper_author_details = paper_authors_df.merge(authors_df, on="authorId", how="inner")
-
-# Join everything to get the full data
-full_data = papers_with_ids.merge(paper_author_details, on="paperId", how="left")
+# Join the tables into one row per paper and author, once without and once with the joined author names
+full_data, final_data_with_authors = join_paper_tables(papers_df, authors_df, paper_authors_df, external_ids_df)
 
 # View the full data
 print(full_data.head())
@@ -179,21 +110,7 @@ print(full_data.head())
 # Save the joined data to a CSV file
 full_data.to_csv(os.path.join(output_dir, "FullData.csv"), index=False)
 
-
-# Group authors by paperId and aggregate their names
-authors_grouped = (
-    paper_authors_df.merge(authors_df, on="authorId", how="inner")
-    .groupby("paperId")["name"]
-    .apply(", ".join)
-    .reset_index()
-    .rename(columns={"name": "authors"})
-)
-
-# Merge the grouped authors back with the papers data
-papers_with_authors = papers_with_ids.merge(authors_grouped, on="paperId", how="left")
-
 # Save the final data to CSV
-final_data_with_authors = papers_with_authors.merge(paper_author_details, on="paperId", how="left").drop_duplicates()
 final_data_with_authors.to_csv(os.path.join(output_dir, "PapersWithAuthors.csv"), index=False)
 
 # View the final data
@@ -202,16 +119,12 @@ print(final_data_with_authors.head())
 
 pdf = pd.read_csv("dblpval.csv")
 pdf = pdf[pdf['data_source']=="Semantic Scholar"]
-pdf['paperid'] = "null"
-for idx, row in pdf.iterrows():
-    pdf.at[idx,'paperid'] = row['link'].split('/')[-1]
+pdf['paperid'] = semantic_scholar_ids(pdf['link'])
 
 
 df = pd.read_csv("dblpval.csv")
 df = pdf[pdf['data_source']=="Semantic Scholar"]
-df['paperid'] = "null"
-for idx, row in pdf.iterrows():
-    df.at[idx,'paperid'] = row['link'].split('/')[-1]
+df['paperid'] = semantic_scholar_ids(pdf['link'])
 
 result = df.merge(pdf[['paperid', 'publication_date']], on='paperid')
 result = result.dropna(subset = 'title').drop_duplicates(subset = 'link')
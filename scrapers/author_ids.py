@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+
+from common.text import normalize_keyword
+from scrapers.checkpoint import JsonlCheckpoint
+
+
+def _is_author_id(value) -> bool:
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def override_ids(name: str, ids) -> list:
+    """Returns the author IDs of an override entry, a list of IDs or a single ID"""
+    if _is_author_id(ids):
+        return [str(ids)]
+    if isinstance(ids, list) and all(_is_author_id(author_id) for author_id in ids):
+        return [str(author_id) for author_id in ids]
+    raise ValueError(f"Override of {name!r} must be an author ID or a list of author IDs, got {ids!r}")
+
+
+class AuthorIdResolver:
+    """
+    Persistent name -> author-ID table in front of an author search.
+
+    Names resolved within ``ttl_seconds`` (``empty_ttl_seconds`` for names
+    no author was found for) are answered from the table without a search.
+    A manual override file, a JSON object of name -> list of IDs, takes
+    precedence over both the table and the search; a single ID may be given
+    on its own. Names are keyed like search keywords, lower-cased with
+    whitespace collapsed.
+
+    Each resolution is appended to a JsonlCheckpoint, the last line of a
+    name winning; close() rewrites the file with one line per name. Both
+    files are read on first use, not when the resolver is created.
+    """
+
+    def __init__(
+                self,
+                file_path: str,
+                overrides_path: str = None,
+                ttl_seconds: float = 30 * 24 * 3600,
+                empty_ttl_seconds: float = 24 * 3600
+            ) -> None:
+        '''
+        :param str file_path: path of the JSONL resolution table.
+        :param str overrides_path: (optional) path of the JSON override file.
+        :param float ttl_seconds: (optional) age after which a name is searched again.
+        :param float empty_ttl_seconds: (optional) the same for names that had no match.
+        '''
+        self.checkpoint = JsonlCheckpoint(file_path)
+        self.overrides_path = overrides_path
+        self.ttl_seconds = ttl_seconds
+        self.empty_ttl_seconds = empty_ttl_seconds
+        self.searches = 0
+        self._lock = threading.Lock()
+        self._entries = None
+        self._overrides = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._entries is not None:
+                return
+            overrides = {}
+            if self.overrides_path and os.path.exists(self.overrides_path):
+                with open(self.overrides_path, 'r', encoding='utf-8') as f:
+                    overrides = json.load(f)
+            self._overrides = {normalize_keyword(name): override_ids(name, ids) for name, ids in overrides.items()}
+            self._entries = {record['name']: record for record in self.checkpoint.records()}
+
+    def cached(self, full_name: str):
+        """Returns the author IDs known for a name without searching, or None"""
+        self._load()
+        key = normalize_keyword(full_name)
+        if key in self._overrides:
+            return self._overrides[key]
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        ttl = self.ttl_seconds if entry['author_ids'] else self.empty_ttl_seconds
+        if time.time() - entry['resolved_at'] > ttl:
+            return None
+        return entry['author_ids']
+
+    def resolve(self, full_name: str, search) -> list:
+        """
+        Returns the author IDs of a name, calling search(full_name) and
+        storing its result when the table has no fresh entry.
+        """
+        author_ids = self.cached(full_name)
+        if author_ids is not None:
+            return list(author_ids)
+        author_ids = list(dict.fromkeys(search(full_name)))
+        key = normalize_keyword(full_name)
+        entry = {'name': key, 'author_ids': author_ids, 'resolved_at': time.time()}
+        with self._lock:
+            self.searches += 1
+            self._entries[key] = entry
+            self.checkpoint.append(key, entry)
+        return author_ids
+
+    def close(self) -> None:
+        """Rewrites the table with the last resolution of each name"""
+        with self._lock:
+            if self._entries is None:
+                self.checkpoint.close()
+            else:
+                self.checkpoint.rewrite(self._entries.items())
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+from common.files import atomic_write
+
+
+class JsonlCheckpoint:
+    """
+    Append-only checkpoint of fetched records, one JSON object per line.
+
+    Every line stores the requested ID next to the response, so a rerun
+    resumes from the set of completed IDs rather than from a position in a
+    list. Lines are flushed as they are written and fsynced every
+    ``fsync_every`` records or ``fsync_interval`` seconds, whichever comes
+    first; a line cut short by a crash is ignored when reading.
+    """
+
+    def __init__(self, file_path: str, fsync_every: int = 100, fsync_interval: float = 10.0):
+        '''
+        :param str file_path: path of the JSONL file.
+        :param int fsync_every: (optional) fsync after this many appended records.
+        :param float fsync_interval: (optional) fsync at least this often, in seconds.
+        '''
+        self.file_path = file_path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _lines(self):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def completed_ids(self) -> set:
+        """Returns the IDs that already have a record"""
+        return {line['id'] for line in self._lines()}
+
+    def records(self):
+        """Yields the stored records, in the order they were fetched"""
+        for line in self._lines():
+            yield line['record']
+
+    def _open(self):
+        if self._file is None:
+            needs_newline = False
+            if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
+                with open(self.file_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b'\n'
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+            if needs_newline:
+                # Terminate a line cut short by a crash, so it does not swallow the next record
+                self._file.write('\n')
+        return self._file
+
+    def append(self, record_id: str, record) -> None:
+        f = self._open()
+        f.write(json.dumps({'id': record_id, 'record': record}) + '\n')
+        f.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def rewrite(self, records) -> None:
+        """Replaces the file with the given (record_id, record) pairs, e.g. to drop superseded lines"""
+        self.close()
+        with atomic_write(self.file_path, 'w', encoding='utf-8') as f:
+            for record_id, record in records:
+                f.write(json.dumps({'id': record_id, 'record': record}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from scrapers.checkpoint import JsonlCheckpoint
+
+
+class AuthorCrawlState:
+    """
+    Per-author state of an incremental crawl: the resolved author IDs, the
+    period crawled so far and the IDs of the papers already seen. Papers
+    are recognized by those IDs rather than by date, so a paper Semantic
+    Scholar indexes after a crawl is still new to the next one.
+
+    Entries are appended to a JsonlCheckpoint as each author finishes, so
+    a crash loses at most the authors still in flight; the last entry of
+    an author wins when the state is read back. Closing the state rewrites
+    the file with only those last entries, so it does not grow every run.
+    """
+
+    def __init__(self, file_path: str):
+        '''
+        :param str file_path: path of the JSONL state file.
+        '''
+        self.checkpoint = JsonlCheckpoint(file_path, fsync_every=1)
+        self.entries = {record['name']: record for record in self.checkpoint.records()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, full_name: str):
+        """Returns the stored entry of an author, or None"""
+        return self.entries.get(full_name)
+
+    def update(self, full_name: str, author_ids: list, start_date: datetime, end_date: datetime, paper_ids) -> None:
+        """Records a finished crawl of an author and writes it to disk"""
+        entry = self.get(full_name)
+        crawled_from, crawled_until = start_date, end_date
+        seen = set(paper_ids)
+        if entry is not None:
+            # Papers seen before stay in the results of earlier runs
+            seen.update(entry['paper_ids'])
+            previous_from = datetime.fromisoformat(entry['crawled_from'])
+            previous_until = datetime.fromisoformat(entry['crawled_until'])
+            if previous_from <= start_date <= previous_until:
+                # The new crawl continued the previous one
+                crawled_from, crawled_until = previous_from, max(end_date, previous_until)
+        entry = {
+            'name': full_name,
+            'author_ids': list(author_ids),
+            'crawled_from': crawled_from.isoformat(),
+            'crawled_until': crawled_until.isoformat(),
+            'paper_ids': sorted(seen),
+        }
+        self.entries[full_name] = entry
+        self.checkpoint.append(full_name, entry)
+
+    def close(self) -> None:
+        self.checkpoint.rewrite(self.entries.items())
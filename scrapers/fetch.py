@@ -0,0 +1,325 @@
+import bisect
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf'))
+
+# Path segments that identify a record rather than an endpoint: numeric IDs,
+# Semantic Scholar paper hashes, OpenAlex IDs and prefixed IDs like DOI:...
+_ID_SEGMENT = re.compile(r'\d+|[0-9a-fA-F]{40}|[A-Z]\d+|[A-Za-z]+:.+')
+
+
+def endpoint_name(url: str) -> str:
+    """Returns host and path of a URL with record IDs replaced by {id}, e.g. api.x.org/author/{id}/papers"""
+    parts = urlsplit(url)
+    segments = ['{id}' if _ID_SEGMENT.fullmatch(segment) else segment for segment in parts.path.split('/')]
+    return f"{parts.hostname}{'/'.join(segments)}"
+
+
+def pooled_session(pool_size: int = 10) -> requests.Session:
+    """Returns a Session keeping up to pool_size keep-alive connections per host"""
+    session = requests.Session()
+    # Retries are handled by the fetch engine, not by the adapter
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for one host.
+
+    Tokens refill at ``rate`` per second up to ``capacity``; every request
+    takes one. ``pause`` empties the bucket and blocks it for a while, which
+    is how a 429 or Retry-After from the server slows every worker down.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = self._blocked_until
+
+
+class LatencyHistogram:
+    """
+    Counts of request latencies in the LATENCY_BUCKETS_MS buckets
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total_ms = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.total_ms += milliseconds
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the upper bound of the bucket holding the given fraction of requests"""
+        rank = fraction * sum(self.counts)
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return 0.0
+
+    def snapshot(self) -> dict:
+        count = sum(self.counts)
+        return {
+            'count': count,
+            'mean_ms': round(self.total_ms / count, 1) if count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p90_ms': self.percentile(0.9),
+            'p99_ms': self.percentile(0.99),
+            'buckets_ms': {f"<={bound:g}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts) if count},
+        }
+
+
+class FetchStats:
+    """
+    Thread-safe request counters of a fetch engine
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.latency = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_latency(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            if endpoint not in self.latency:
+                self.latency[endpoint] = LatencyHistogram()
+            self.latency[endpoint].add(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                'requests': self.requests,
+                'successes': self.successes,
+                'errors': self.errors,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'cache_hits': self.cache_hits,
+                'revalidated': self.revalidated,
+                'elapsed_seconds': round(elapsed, 1),
+                'throughput_per_second': self.successes / elapsed if elapsed > 0 else 0.0,
+                'error_rate': self.errors / self.requests if self.requests else 0.0,
+                'latency': {endpoint: histogram.snapshot() for endpoint, histogram in sorted(self.latency.items())},
+            }
+
+
+def retry_after_seconds(response: requests.Response):
+    """Returns the delay asked for by a Retry-After header, in seconds, or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class FetchEngine:
+    """
+    Shared HTTP fetch engine: a pool of workers, a token bucket per host,
+    and retries with jittered exponential backoff, over one pooled
+    keep-alive session so requests reuse their TCP and TLS connections.
+
+    Connection errors, timeouts, 429 and 5xx responses are retried; a 429
+    or a Retry-After header pauses every request to that host. Other
+    responses, including 4xx, are returned to the caller as they are.
+    With a ResponseCache, fresh cached responses are returned without a
+    request and stale ones are revalidated when the server allows it.
+    """
+
+    def __init__(
+                self,
+                workers: int = 4,
+                rate_limits: dict = None,
+                default_rate: float = 1.0,
+                max_attempts: int = 5,
+                backoff_base: float = 1.0,
+                backoff_max: float = 120.0,
+                timeout=30.0,
+                session=None,
+                pool_size: int = None,
+                cache=None
+            ) -> None:
+        '''
+        :param int workers: (optional) number of concurrent workers used by map.
+        :param dict rate_limits: (optional) host -> requests per second.
+        :param float default_rate: (optional) requests per second for other hosts.
+        :param int max_attempts: (optional) attempts per request before giving up.
+        :param float backoff_base: (optional) first backoff delay, in seconds.
+        :param float backoff_max: (optional) longest backoff delay, in seconds.
+        :param timeout: (optional) default timeout of a request, in seconds,
+            or a (connect, read) tuple.
+        :param session: (optional) object with a requests-style ``request``
+            method; a pooled_session by default.
+        :param int pool_size: (optional) connections kept alive per host by
+            the default session; ``workers`` by default.
+        :param cache: (optional) ResponseCache of successful responses.
+        '''
+        self.workers = workers
+        self.rate_limits = dict(rate_limits or {})
+        self.default_rate = default_rate
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = session if session is not None else pooled_session(pool_size or workers)
+        self.cache = cache
+        self.stats = FetchStats()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_limits.get(host, self.default_rate))
+            return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so workers that failed together do not retry together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request once the host's rate limit allows it, retrying
+        transient failures. Responses served from the cache have
+        ``from_cache`` set.
+
+        :raises: requests.ConnectionError, requests.Timeout or
+            requests.HTTPError once the attempts are used up.
+        """
+        if self.cache is None:
+            return self._send(method, url, **kwargs)
+
+        key = self.cache.key(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+        cached = self.cache.get(key)
+        if cached is not None:
+            if self.cache.is_fresh(cached, url):
+                self.stats.record(cache_hits=1)
+                return cached.to_response()
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **cached.validators()}
+
+        response = self._send(method, url, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.stats.record(revalidated=1)
+            self.cache.refresh(key, cached, response)
+            return cached.to_response()
+        self.cache.put(key, response)
+        return response
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        bucket = self._bucket(urlsplit(url).hostname)
+        endpoint = endpoint_name(url)
+        for attempt in range(1, self.max_attempts + 1):
+            last_attempt = attempt == self.max_attempts
+            bucket.acquire()
+            self.stats.record(requests=1)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.record(errors=1)
+                if last_attempt:
+                    raise
+                self.stats.record(retries=1)
+                time.sleep(self._backoff(attempt))
+                continue
+            self.stats.record_latency(endpoint, time.perf_counter() - started)
+
+            if response.status_code == 429 or response.status_code >= 500:
+                self.stats.record(errors=1)
+                if last_attempt:
+                    response.raise_for_status()
+                self.stats.record(retries=1)
+                delay = retry_after_seconds(response)
+                if response.status_code == 429 or delay is not None:
+                    self.stats.record(throttled=1)
+                    bucket.pause(delay if delay is not None else self._backoff(attempt))
+                else:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code >= 400:
+                self.stats.record(errors=1)
+            else:
+                self.stats.record(successes=1)
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def map(self, func, items, workers: int = None):
+        """
+        Calls func on every item from a pool of ``workers`` threads (the
+        engine's by default) and yields (item, result, error) tuples as
+        they complete; error is the exception raised by func, or None.
+        """
+        pool = ThreadPoolExecutor(max_workers=workers or self.workers)
+        try:
+            futures = {pool.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
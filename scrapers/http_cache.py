@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from common.files import atomic_write
+
+ENTRY_SUFFIX = '.resp'
+
+
+def normalize_request(method: str, url: str, params=None, json_body=None, data=None) -> str:
+    """
+    Returns a canonical description of a request: lower-cased scheme and
+    host, query parameters (from the URL and params) sorted, and a JSON
+    body with sorted keys. Requests that differ only in those are equal.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    query = urlencode(sorted((str(name), str(value)) for name, value in query))
+    url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+    body = json.dumps(json_body, sort_keys=True) if json_body is not None else data
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    return f"{method.upper()} {url}\n{body or ''}"
+
+
+class CachedResponse:
+    """
+    Stores a cached response: status, headers, body and the time it was
+    fetched or last revalidated
+    """
+
+    def __init__(self, url: str, status_code: int, reason: str, headers: dict, content: bytes, stored_at: float):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.stored_at = stored_at
+
+    def validators(self) -> dict:
+        """Returns the conditional request headers the server can answer with 304 Not Modified"""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.url = self.url
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """
+    Disk cache of HTTP responses, keyed by the normalized request.
+
+    Each entry is one file: a JSON header line followed by the raw body.
+    Entries are fresh for the TTL of their endpoint; a stale entry is
+    revalidated with its ETag or Last-Modified when it has one, and
+    refetched otherwise. The file modification time records the last use,
+    and the least recently used entries are removed once the cache grows
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: dict = None, default_ttl: float = 86400, max_bytes: int = 1 << 30):
+        '''
+        :param str cache_dir: folder of the cache entries.
+        :param dict ttl_seconds: (optional) URL prefix -> time-to-live in
+            seconds; the longest matching prefix applies.
+        :param float default_ttl: (optional) time-to-live of other URLs, in seconds.
+        :param int max_bytes: (optional) size the cache is trimmed back to.
+        '''
+        self.cache_dir = cache_dir
+        self.ttl_seconds = dict(ttl_seconds or {})
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Measured on the first write, so creating a cache does not scan its folder
+        self._size = None
+
+    def key(self, method: str, url: str, params=None, json_body=None, data=None) -> str:
+        return hashlib.sha256(normalize_request(method, url, params, json_body, data).encode('utf-8')).hexdigest()
+
+    def ttl(self, url: str) -> float:
+        prefixes = [prefix for prefix in self.ttl_seconds if url.startswith(prefix)]
+        return self.ttl_seconds[max(prefixes, key=len)] if prefixes else self.default_ttl
+
+    def is_fresh(self, entry: CachedResponse, url: str) -> bool:
+        """Returns whether an entry cached for a request to url is within its TTL"""
+        return time.time() - entry.stored_at <= self.ttl(url)
+
+    def _entries(self) -> list:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(ENTRY_SUFFIX)]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{ENTRY_SUFFIX}")
+
+    def get(self, key: str):
+        """Returns the CachedResponse stored under key, fresh or not, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                content = f.read()
+            # Mark as recently used, so eviction removes the least recently used entries
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(content=content, **header)
+
+    def _write(self, key: str, entry: CachedResponse) -> None:
+        path = self._path(key)
+        header = {
+            'url': entry.url,
+            'status_code': entry.status_code,
+            'reason': entry.reason,
+            'headers': dict(entry.headers),
+            'stored_at': entry.stored_at,
+        }
+        data = json.dumps(header).encode('utf-8') + b'\n' + entry.content
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        with atomic_write(path, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def put(self, key: str, response: requests.Response) -> None:
+        """Stores a successful response, unless the server forbids storing it"""
+        if response.status_code != 200 or 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        self._write(key, CachedResponse(
+            response.url, response.status_code, response.reason, dict(response.headers), response.content, time.time()
+        ))
+
+    def refresh(self, key: str, entry: CachedResponse, not_modified: requests.Response) -> None:
+        """Marks an entry fresh again after the server answered 304 Not Modified"""
+        for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires'):
+            if not_modified.headers.get(name):
+                entry.headers[name] = not_modified.headers[name]
+        entry.stored_at = time.time()
+        self._write(key, entry)
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        # Trim to 90% of the limit, so the next few writes do not evict again
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._size <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries():
+                os.remove(entry.path)
+            self._size = 0
@@ -0,0 +1,137 @@
+"""
+Author-name normalization and matching.
+
+A name is reduced once to a few keys of the form ``"<surname> <first
+initial>"``: diacritics are dropped, case is folded, hyphens and
+apostrophes inside a surname are removed, periods split initials
+("J.R. Smith"), and a "Surname, Given" spelling is put back in given-name
+order. Besides its canonical key, a name has a variant key for a
+two-word surname ("Martínez López" and "Martínez-López"). Two names match
+when the canonical key of one is a key of the other, or when one is the
+other with its first and last words swapped ("Li Wei" and "Wei Li"); an
+initial is not enough for a swap, since "Li Wang" is not "Wei Li".
+Matching many names is a handful of dictionary lookups per name.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+_SEPARATORS = re.compile(r"[\s.]+")
+_JOINERS = re.compile(r"[-\u2010\u2011'\u2019]")
+_NON_LETTERS = re.compile(r"[^\w]+")
+
+
+def strip_diacritics(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def name_tokens(full_name: str) -> list:
+    """Returns the normalized tokens of a name, in given-name-first order"""
+    if not isinstance(full_name, str):
+        return []
+    text = strip_diacritics(full_name).casefold()
+    if ',' in text:
+        surname, _, given = text.partition(',')
+        text = f"{given} {surname}"
+    tokens = []
+    for token in _SEPARATORS.split(text):
+        # "Smith-Jones" and "O'Brien" are one surname, "Jean-Luc" keeps its initial
+        token = _NON_LETTERS.sub('', _JOINERS.sub('', token))
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def name_key(full_name: str):
+    """Returns the canonical key of a name, or None for names without a given name and a surname"""
+    tokens = name_tokens(full_name)
+    if len(tokens) < 2:
+        return None
+    return f"{tokens[-1]} {tokens[0][0]}"
+
+
+def name_keys(full_name: str) -> list:
+    """
+    Returns the keys of a name: the canonical key first, then the key with the
+    last two words as one surname. Empty for names without a given name and a
+    surname.
+    """
+    tokens = name_tokens(full_name)
+    if len(tokens) < 2:
+        return []
+    keys = [name_key(full_name)]
+    if len(tokens) > 2:
+        keys.append(f"{tokens[-2]}{tokens[-1]} {tokens[0][0]}")
+    return list(dict.fromkeys(keys))
+
+
+def full_name_keys(full_name: str) -> tuple:
+    """
+    Returns the "<surname> <given name>" key of a name and the same key with
+    its first and last words swapped, or None for names without a given name
+    and a surname. A name is another swapped when its key is the other's
+    swapped key.
+    """
+    tokens = name_tokens(full_name)
+    if len(tokens) < 2:
+        return None
+    return f"{tokens[-1]} {tokens[0]}", f"{tokens[0]} {tokens[-1]}"
+
+
+def same_author(first: str, second: str) -> bool:
+    """Checks if two author names have the same surname and first initial, or are the same name swapped"""
+    first_keys, second_keys = name_keys(first), name_keys(second)
+    if not (first_keys and second_keys):
+        return False
+    if first_keys[0] in second_keys or second_keys[0] in first_keys:
+        return True
+    # Swapped names must match in full: "Wei Li" is "Li Wei", but not "Li Wang"
+    return full_name_keys(first)[0] == full_name_keys(second)[1]
+
+
+class NameIndex:
+    """
+    Hash index from name keys to the values, such as author IDs, added under
+    those names. Values are indexed under all the keys of their name,
+    separately under its canonical key alone, and under its full-name key,
+    so a lookup finds the names same_author matches.
+    """
+
+    def __init__(self):
+        self._values = defaultdict(list)
+        self._canonical = defaultdict(list)
+        self._full = defaultdict(list)
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def add(self, full_name: str, value) -> None:
+        keys = name_keys(full_name)
+        if not keys:
+            return
+        full_key, _ = full_name_keys(full_name)
+        indexed = [(self._canonical, keys[0]), (self._full, full_key)]
+        indexed += [(self._values, key) for key in keys]
+        for index, key in indexed:
+            if value not in index[key]:
+                index[key].append(value)
+
+    def lookup(self, full_name: str) -> list:
+        """Returns the values added under names matching full_name, canonical-key matches first"""
+        keys = name_keys(full_name)
+        if not keys:
+            return []
+        values = list(self._values.get(keys[0], []))
+        for key in keys[1:]:
+            values.extend(self._canonical.get(key, []))
+        _, swapped_key = full_name_keys(full_name)
+        values.extend(self._full.get(swapped_key, []))
+        return list(dict.fromkeys(values))
+
+    @classmethod
+    def from_records(cls, records, name_field: str = 'name', value_field: str = 'authorId'):
+        """Builds an index of value_field by name_field from API records, e.g. author search results"""
+        index = cls()
+        for record in records:
+            index.add(record.get(name_field), record.get(value_field))
+        return index
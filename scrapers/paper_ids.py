@@ -0,0 +1,67 @@
+"""
+Paper-ID extraction from the links of the collected papers.
+
+Every function works on a whole column of links with vectorized string
+operations. Recognized forms are Semantic Scholar paper pages, DOIs,
+arXiv abstracts or PDFs, and OpenAlex works; canonical IDs prefix the ID
+with its type, so equal IDs from different URL forms compare equal.
+"""
+import re
+
+import pandas as pd
+
+# Checked in this order when a link could match several forms
+LINK_PATTERNS = {
+    "s2": r"semanticscholar\.org/(?:paper|p)/(?:[^?#]*/)?([0-9a-f]{40})(?![0-9a-f])",
+    "doi": r"(?:doi\.org/|doi:\s*)(10\.\d{4,9}/[^\s?#]+)",
+    "arxiv": r"arxiv\.org/(?:abs|pdf)/((?:[a-z\-]+(?:\.[a-z]{2})?/\d{7})|(?:\d{4}\.\d{4,5}))",
+    "openalex": r"openalex\.org/(?:works/)?(w\d+)(?![0-9])",
+}
+
+
+def extract_paper_ids(links: pd.Series) -> pd.DataFrame:
+    """
+    Returns one column per ID type (s2, doi, arxiv, openalex) holding the
+    ID found in each link, or NaN. arXiv IDs lose their version suffix.
+    """
+    text = links.fillna('').astype(str)
+    ids = pd.DataFrame(
+        {id_type: text.str.extract(pattern, flags=re.IGNORECASE, expand=False) for id_type, pattern in LINK_PATTERNS.items()},
+        index=links.index
+    )
+    ids["s2"] = ids["s2"].str.lower()
+    # DOIs are case-insensitive
+    ids["doi"] = ids["doi"].str.lower()
+    ids["arxiv"] = ids["arxiv"].str.lower()
+    ids["openalex"] = ids["openalex"].str.upper()
+    return ids
+
+
+def canonical_paper_ids(links: pd.Series) -> pd.Series:
+    """Returns 'type:id' for the first recognized ID of each link, or NaN"""
+    ids = extract_paper_ids(links)
+    canonical = pd.Series(pd.NA, index=links.index, dtype=object)
+    for id_type in reversed(LINK_PATTERNS):
+        found = ids[id_type].notna()
+        canonical[found] = f"{id_type}:" + ids.loc[found, id_type]
+    return canonical
+
+
+def semantic_scholar_ids(links: pd.Series) -> pd.Series:
+    """
+    Returns the Semantic Scholar paper ID of each link. Links of other
+    forms keep their last path segment, as the collection scripts did.
+    """
+    return extract_paper_ids(links)["s2"].fillna(links.str.split('/').str[-1])
+
+
+def unique_papers_mask(df: pd.DataFrame, link_column: str = 'link', title_column: str = 'title') -> pd.Series:
+    """
+    Returns a mask keeping the first row of every paper. Rows are the same
+    paper when they share a canonical ID (or, without one, the same link);
+    among those kept, rows repeating an earlier title are dropped too.
+    """
+    key = canonical_paper_ids(df[link_column]).fillna("link:" + df[link_column].astype(str))
+    keep = ~key.duplicated()
+    keep[keep] = ~df.loc[keep, title_column].duplicated()
+    return keep
@@ -0,0 +1,59 @@
+"""
+Joins of the normalized paper tables into the FullData and
+PapersWithAuthors outputs.
+
+Paper and author IDs are replaced by integer codes shared across the
+tables, the paper -> author links are resolved once, and both outputs are
+built from the same joined frame.
+"""
+import numpy as np
+import pandas as pd
+
+
+def factorize_together(*columns) -> list:
+    """Returns integer codes for each column, equal across columns for equal values; missing values get -1"""
+    codes, _ = pd.factorize(pd.concat(columns, ignore_index=True))
+    bounds = np.cumsum([0] + [len(column) for column in columns])
+    return [codes[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def join_paper_tables(
+            papers_df: pd.DataFrame,
+            authors_df: pd.DataFrame,
+            paper_authors_df: pd.DataFrame,
+            external_ids_df: pd.DataFrame
+        ) -> tuple:
+    """
+    Joins papers with their external IDs and authors.
+
+    :returns: (full_data, papers_with_authors). full_data has one row per
+        paper and author, papers without authors keeping a single row.
+        papers_with_authors holds the same rows without duplicates, with
+        an extra ``authors`` column listing the paper's author names.
+        The rows, and the names within ``authors``, are the ones the
+        chained merges of paper_collection.py produced, but not
+        necessarily in the same order.
+    """
+    paper_codes = factorize_together(papers_df["paperId"], external_ids_df["paperId"], paper_authors_df["paperId"])
+    author_codes = factorize_together(paper_authors_df["authorId"], authors_df["authorId"])
+
+    papers_with_ids = papers_df.assign(_paper=paper_codes[0]).merge(
+        external_ids_df.drop(columns="paperId").assign(_paper=paper_codes[1]), on="_paper", how="left"
+    )
+    links = paper_authors_df[["authorId"]].assign(_paper=paper_codes[2], _author=author_codes[0]).merge(
+        authors_df.drop(columns="authorId").assign(_author=author_codes[1]), on="_author", how="inner"
+    )
+
+    full_data = papers_with_ids.merge(links[["_paper", "authorId", "name"]], on="_paper", how="left")
+    paper_code = full_data.pop("_paper")
+
+    names = links["name"].dropna()
+    authors_by_paper = names.groupby(links.loc[names.index, "_paper"].to_numpy(), sort=False).agg(", ".join)
+
+    papers_with_authors = full_data.drop_duplicates()
+    papers_with_authors.insert(
+        papers_with_authors.columns.get_loc("authorId"),
+        "authors",
+        paper_code.loc[papers_with_authors.index].map(authors_by_paper).to_numpy()
+    )
+    return full_data, papers_with_authors
@@ -0,0 +1,296 @@
+"""
+Normalization of fetched paper records into the Papers, Authors,
+PaperAuthors and ExternalIds tables.
+
+Records are streamed from the dump one at a time and their fields
+accumulated in plain column lists; every ``chunk_size`` papers the lists
+are turned into DataFrames with a single constructor and appended to the
+CSV tables, so memory is bounded by the chunk rather than by the dump.
+Rows already written are remembered as 64-bit hashes, 8 bytes per row.
+"""
+import contextlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from common.files import atomic_path, atomic_write
+
+TABLE_COLUMNS = {
+    "Papers": ["paperId", "title", "citationCount"],
+    "Authors": ["authorId", "name"],
+    "PaperAuthors": ["paperId", "authorId"],
+    "ExternalIds": ["paperId", "DBLP", "ArXiv", "DOI", "CorpusId", "MAG", "PubMed", "PubMedCentral", "ACL"],
+}
+
+STATE_FILE_NAME = "normalize_state.json"
+DEFAULT_CHUNK_SIZE = 10000
+READ_SIZE = 1 << 20
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_array(file_path: str, read_size: int = READ_SIZE):
+    """
+    Yields the items of a file holding one JSON array, decoding them one at
+    a time from a buffer of about ``read_size`` characters instead of
+    loading the whole array.
+
+    :raises: ValueError if the file does not hold a complete JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof, opened = '', 0, False, False
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer):
+                if not opened:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{file_path} does not hold a JSON array")
+                    opened, pos = True, pos + 1
+                    continue
+                if buffer[pos] == ']':
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A value is complete once a separator follows it: "-3." may be the start of "-3.5"
+                    after = _WHITESPACE.match(buffer, end).end()
+                    if after < len(buffer) and buffer[after] in ',]':
+                        yield item
+                        pos = after
+                        continue
+                    if eof:
+                        raise ValueError(f"{file_path} does not hold a valid JSON array")
+            elif eof:
+                raise ValueError(f"{file_path} ends before its JSON array is closed")
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_json_lines(file_path: str, offset: int = 0):
+    """
+    Yields (record, next_offset) for the complete lines of a JSONL file
+    after the given byte offset. Lines written by a JsonlCheckpoint are
+    unwrapped to their record; other lines are yielded as they are.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                # Still being written, or cut short by a crash
+                break
+            offset += len(raw)
+            try:
+                line = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(line, dict) and line.keys() == {'id', 'record'}:
+                line = line['record']
+            yield line, offset
+
+
+def read_records(file_path: str, offset: int = 0):
+    """
+    Streams the fetched responses of a dump as (record, next_offset) pairs.
+
+    :param str file_path: a ``.jsonl`` file, such as a JsonlCheckpoint, or a
+        ``.json`` file holding an array of responses.
+    :param int offset: (optional) byte offset to resume a JSONL file from;
+        JSON arrays are always read from the start and next_offset is None.
+    """
+    if file_path.endswith('.jsonl'):
+        yield from iter_json_lines(file_path, offset)
+    else:
+        for record in iter_json_array(file_path):
+            yield record, None
+
+
+class PaperTableColumns:
+    """
+    Column lists of the four tables, filled one record at a time
+    """
+
+    def __init__(self):
+        self.columns = {table: {column: [] for column in columns} for table, columns in TABLE_COLUMNS.items()}
+
+    def __len__(self):
+        return len(self.columns["Papers"]["paperId"])
+
+    def _append(self, table: str, values: dict) -> None:
+        for column, column_values in self.columns[table].items():
+            column_values.append(values.get(column))
+
+    def add_record(self, responses_item) -> None:
+        """Adds the papers of one fetched response ({'papers': [...]})"""
+        papers = responses_item.get('papers', []) if isinstance(responses_item, dict) else []
+        if not isinstance(papers, list):
+            return
+        for paper in papers:
+            if not isinstance(paper, dict):
+                continue
+            paper_id = paper.get('paperId')
+            self._append("Papers", paper)
+            external_ids = paper.get('externalIds') or {}
+            self._append("ExternalIds", {**external_ids, "paperId": paper_id})
+
+            authors = paper.get('authors', [])
+            if not isinstance(authors, list):
+                continue
+            for author in authors:
+                if isinstance(author, dict) and author.get('authorId') is not None:
+                    self._append("Authors", author)
+                    self._append("PaperAuthors", {"paperId": paper_id, "authorId": author['authorId']})
+
+    def to_frames(self) -> dict:
+        """Returns table name -> deduplicated DataFrame"""
+        frames = {}
+        for table, columns in self.columns.items():
+            # object dtype keeps integer IDs with missing values from turning into floats
+            frame = pd.DataFrame({column: pd.Series(values, dtype=object) for column, values in columns.items()})
+            frames[table] = frame.drop_duplicates()
+        return frames
+
+
+def normalize_records(records) -> dict:
+    """Normalizes an iterable of fetched responses into table name -> DataFrame, in one pass"""
+    columns = PaperTableColumns()
+    for record in records:
+        columns.add_record(record)
+    return columns.to_frames()
+
+
+def _as_strings(frame: pd.DataFrame) -> pd.DataFrame:
+    # Matches how the tables read back from CSV with dtype=str, so rows compare equal across runs
+    return frame.apply(lambda column: column.map(lambda value: None if value is None or value != value else str(value)))
+
+
+def _load_state(output_dir: str) -> dict:
+    state_path = os.path.join(output_dir, STATE_FILE_NAME)
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(output_dir: str, state: dict) -> None:
+    state_path = os.path.join(output_dir, STATE_FILE_NAME)
+    with atomic_write(state_path, 'w') as f:
+        json.dump(state, f)
+
+
+def _has_rows(table_path: str) -> bool:
+    return os.path.exists(table_path) and os.path.getsize(table_path) > 0
+
+
+def _row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class RowHashes:
+    """
+    Set of 64-bit row hashes, kept as a few sorted uint64 arrays. Runs of
+    similar size are merged as hashes are added, so there are at most
+    log2(n) runs and adding n hashes costs O(n log n) overall.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """Adds hashes and returns the mask of those not seen before, counting only the first of repeats"""
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        for run in self._runs:
+            found = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            new &= run[found] != hashes
+        run = np.sort(hashes[new])
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]))
+        if len(run):
+            self._runs.append(run)
+        return new
+
+
+class PaperTableWriter:
+    """
+    Appends chunks of the four tables to their CSV files, leaving out rows
+    an earlier chunk or run already wrote
+    """
+
+    def __init__(self, table_paths: dict):
+        self.table_paths = table_paths
+        self.rows_written = {table: 0 for table in table_paths}
+        self._seen = {table: RowHashes() for table in table_paths}
+        for table, table_path in table_paths.items():
+            if _has_rows(table_path):
+                for chunk in pd.read_csv(table_path, dtype=str, chunksize=DEFAULT_CHUNK_SIZE):
+                    self._seen[table].add(_row_hashes(_as_strings(chunk)))
+
+    def write(self, columns: PaperTableColumns) -> None:
+        for table, frame in columns.to_frames().items():
+            frame = _as_strings(frame)
+            new = self._seen[table].add(_row_hashes(frame))
+            table_path = self.table_paths[table]
+            frame[new].to_csv(table_path, mode='a', header=not _has_rows(table_path), index=False)
+            self.rows_written[table] += int(new.sum())
+
+
+def build_paper_tables(
+            source,
+            output_dir: str,
+            incremental: bool = False,
+            chunk_size: int = DEFAULT_CHUNK_SIZE
+        ) -> dict:
+    """
+    Normalizes a dump of fetched responses and writes Papers.csv,
+    Authors.csv, PaperAuthors.csv and ExternalIds.csv to output_dir,
+    ``chunk_size`` papers at a time.
+
+    :param source: the JsonlCheckpoint the records were fetched into, or
+        the path of a ``.jsonl`` or ``.json`` dump.
+    :param str output_dir: folder of the CSV tables.
+    :param bool incremental: (optional) only normalize the records appended
+        to a JSONL dump since the last run and add them to the existing tables.
+    :param int chunk_size: (optional) papers held in memory before they are written.
+    :returns: table name -> path of the CSV table.
+    """
+    source_path = os.path.abspath(getattr(source, 'file_path', source))
+    os.makedirs(output_dir, exist_ok=True)
+    table_paths = {table: os.path.join(output_dir, f"{table}.csv") for table in TABLE_COLUMNS}
+    state = _load_state(output_dir)
+    incremental = incremental and state.get('source') == source_path and all(map(os.path.exists, table_paths.values()))
+    offset = (state.get('offset') or 0) if incremental else 0
+
+    with contextlib.ExitStack() as stack:
+        if incremental:
+            write_paths = table_paths
+        else:
+            # A full run replaces the tables only once it is complete
+            write_paths = {table: stack.enter_context(atomic_path(table_path)) for table, table_path in table_paths.items()}
+
+        writer = PaperTableWriter(write_paths)
+        columns = PaperTableColumns()
+        papers = 0
+        next_offset = offset
+        for record, next_offset in read_records(source_path, offset):
+            columns.add_record(record)
+            if len(columns) >= chunk_size:
+                papers += len(columns)
+                writer.write(columns)
+                columns = PaperTableColumns()
+        papers += len(columns)
+        writer.write(columns)
+
+    print(f"Normalized {papers} new papers, rows written: {writer.rows_written}")
+    _save_state(output_dir, {'source': source_path, 'offset': next_offset})
+    return table_paths
@@ -2,18 +2,21 @@ import warnings
 from typing import List
 import urllib.request as libreq
 import urllib
-import requests
 import feedparser
 from datetime import datetime
-import itertools
 import pandas as pd
 from pathlib import Path
 import pickle
 import os
-import time
+import re
 
+from scrapers.author_ids import AuthorIdResolver
 from scrapers.core import AuthorInfo
 from scrapers.core import serialize, deserialize, create_folder_if_not_exists
+from scrapers.crawl_state import AuthorCrawlState
+from scrapers.fetch import FetchEngine
+from scrapers.http_cache import ResponseCache
+from scrapers.names import NameIndex, same_author
 
 from scrapers.semantic_scholar_scraper.semantic_scholar_api_call_manager import ApiCallManager
 from scrapers.semantic_scholar_scraper.semantic_scholar_author import SemanticScholarAuthor
@@ -55,6 +58,33 @@ class SemanticScholarScraper:
 
     auth_header = {}
 
+    # Shared by the static crawl methods: one pooled keep-alive session, rate limited
+    # per host, with retries and backoff. Responses are cached on disk; author searches
+    # change rarely, paper lists grow daily
+    fetch_engine_options = {
+        'workers': 4,
+        'pool_size': 4,
+        'timeout': (5, 30),
+        'rate_limits': {'api.semanticscholar.org': 1.0},
+        'cache': ResponseCache('http_cache', ttl_seconds={
+            f'{DEFAULT_API_URL}/author/search': 7 * 24 * 3600,
+            f'{DEFAULT_API_URL}/author/': 24 * 3600,
+        }),
+    }
+    fetch_engine = FetchEngine(**fetch_engine_options)
+
+    # Name -> author ids resolved by earlier crawls, with manual corrections in the override
+    # file; both are read on first use
+    author_id_resolver = AuthorIdResolver('author_ids.jsonl', overrides_path='author_id_overrides.json')
+
+    # Fields read by paper_info_from_json
+    INTERVAL_PAPER_FIELDS = 'title,url,year,publicationDate,venue,publicationVenue,openAccessPdf'
+
+    # Ids per request of the bulk crawl; /paper/batch takes at most 500, and author
+    # batches stay small enough for the paper lists of prolific authors
+    AUTHOR_BATCH_SIZE = 100
+    PAPER_BATCH_SIZE = 500
+
     def __init__(
                 self,
                 timeout: int = 10,
@@ -537,121 +567,37 @@ class SemanticScholarScraper:
 
     @staticmethod
     def is_a_match(first: str, second: str):
-        """Checks if two author names are a match"""
-        if first == None or second == None:
-            return False
-        parsed_first = first.split(" ")
-        parsed_second = second.split(" ")
-        if len(parsed_first) <= 1 or len(parsed_second) <= 1:
-            return False
-        name_first = parsed_first[0].strip()
-        surname_first = parsed_first[-1].strip()
-        name_second = parsed_second[0].strip()
-        surname_second = parsed_second[-1].strip()
-        if name_first.lower() == name_second.lower() and surname_first.lower() == surname_second.lower():
-            return True
-        if name_first[0].lower() == name_second[0].lower() and surname_first.lower() == surname_second.lower():
-            return True
-        return False
-
-    @staticmethod
-    def standardize_name_word(name: str):
-        s = name.lower()
-        if len(name) == 1:
-            s += "."
-        return s
+        """Checks if two author names are a match: same surname and first initial"""
+        return same_author(first, second)
 
     @staticmethod
-    def standardize_name(full_name: str):
-        parsed = full_name.split(" ")
-        result = []
-        for token in parsed:
-            result.append(SemanticScholarScraper.standardize_name_word(token))
-        return result
+    def configure_fetch_engine(**options) -> None:
+        '''
+        Replaces the fetch engine of the static methods, e.g. to change its
+        pool size or timeouts. Options not given keep their current value.
 
-    @staticmethod
-    def permute(full_name: str):
-        std = SemanticScholarScraper.standardize_name_word(full_name)
-        parsed = std.split(" ")
-        permutations = []
-        if len(parsed) < 1:
-            return False, permutations
-        permutations.extend(list(itertools.permutations(parsed)))
-        for token in parsed:
-            if len(token) == 2 and token.endswith("."):
-                continue
-            modified = f"{token[0]}."
-            arr = []
-            for item in parsed:
-                if item == token:
-                    arr.append(modified)
-                else:
-                    arr.append(item)
-            permutations.extend(list(itertools.permutations(arr)))
-
-        parsed_modified = []
-        irregular = False
-        for token in parsed:
-            if (len(token) == 2 and token.endswith(".")) or len(token) == 1:
-                irregular = True
-                continue
-            parsed_modified.append(token)
-
-        if irregular:
-            permutations.extend(list(itertools.permutations(parsed_modified)))
-            for token in parsed_modified:
-                modified = f"{token[0]}."
-                arr = []
-                for item in parsed_modified:
-                    if item == token:
-                        arr.append(modified)
-                    else:
-                        arr.append(item)
-                permutations.extend(list(itertools.permutations(arr)))
-
-        final = set()
-        for item in permutations:
-            final.add(" ".join(item))
-        return True, final
+        :param options: FetchEngine parameters, such as workers, pool_size
+            or timeout ((connect, read) seconds).
+        '''
+        SemanticScholarScraper.fetch_engine_options = {**SemanticScholarScraper.fetch_engine_options, **options}
+        SemanticScholarScraper.fetch_engine = FetchEngine(**SemanticScholarScraper.fetch_engine_options)
 
     @staticmethod
-    def get_author_id_list(name: str, surname: str):
-        """Returns a list of author ids for a given name and surname"""
+    def get_author_id_list(name: str, surname: str, full_name: str = None):
+        """
+        Returns a list of author ids for a given name and surname. The names found are
+        matched against full_name, "name surname" by default.
+        """
         search_url = f"https://api.semanticscholar.org/graph/v1/author/search?query={name}+{surname}"
-        response = requests.get(search_url)
+        response = SemanticScholarScraper.fetch_engine.get(search_url)
         results = response.json()["data"]
-        lst = []
-        for result in results:
-            current_name = result["name"]
-            if name in current_name and surname in current_name:
-                lst.append(result["authorId"])
-            if name[0] in current_name and surname in current_name:
-                lst.append(result["authorId"])
-        return lst
-
-
-        # returned_names = set()
-        # name_to_id = {}
-        # for result in results:
-        #     modified = result["name"].lower()
-        #     returned_names.add(modified)
-        #     name_to_id[modified] = result["authorId"]
-        # #print(name_to_id)
-        # lst = []
-        # valid, permutations = SemanticScholarScraper.permute(f"{name} {surname}")
-        # if not valid:
-        #     return lst
-        # common = returned_names & permutations
-        #
-        # if len(common) > 0:
-        #     for name in common:
-        #         lst.append(name_to_id[name])
-        # return lst
+        # Returned names with the same surname and first initial, each id once
+        return NameIndex.from_records(results).lookup(full_name or f"{name} {surname}")
 
     @staticmethod
     def test_access_author_id(name: str, surname: str):
         search_url = f"https://api.semanticscholar.org/graph/v1/author/search?query={name}+{surname}"
-        response = requests.get(search_url)
+        response = SemanticScholarScraper.fetch_engine.get(search_url)
         results = response.json()["data"]
         return results
 
@@ -660,58 +606,82 @@ class SemanticScholarScraper:
         print(lst)
 
     @staticmethod
-    def get_papers_by_time_interval(author_id: str, start_date: datetime, end_date: datetime):
-        """Returns a list of papers for a given author id and a given time period"""
+    def paper_info_from_json(paper: dict) -> SemanticScholarPaperInfo:
+        """Returns the SemanticScholarPaperInfo of a paper from the API, or None if it has no year"""
+        if "year" not in paper or paper["year"] == None:
+            return None
+        info = SemanticScholarPaperInfo()
+        if "publicationDate" in paper and paper["publicationDate"] != None:
+            info.publication_date = datetime.strptime(paper["publicationDate"], "%Y-%m-%d")
+        info.year = paper["year"]
+        info.id = paper["paperId"]
+        info.url = paper["url"]
+        info.title = paper["title"]
+        info.source = paper["venue"]
+        if paper["publicationVenue"] != None:
+            if "type" in paper["publicationVenue"]:
+                info.venue = paper["publicationVenue"]["type"]
+            elif info.source == "arXiv.org":
+                info.venue = "arXiv"
+
+        if "openAccessPdf" in paper:
+            info.openAccessPdf = paper["openAccessPdf"]
+        return info
+
+    @staticmethod
+    def iter_papers_by_time_interval(
+                author_id: str,
+                start_date: datetime,
+                end_date: datetime,
+                page_size: int = 1000,
+                stop_after_old_pages: int = None
+            ):
+        """
+        Yields the papers of a given author id published in a given time period,
+        as the pages of /author/{id}/papers arrive.
+
+        Pages follow the offset/next protocol of PaginatedResults, but go through
+        the shared fetch engine, and are read until there is no next page.
+        :param page_size: papers per request; 1000 is the most the endpoint returns.
+        :param stop_after_old_pages: (optional) stop once this many consecutive pages
+            hold only papers older than the period. The API does not document the
+            order of an author's papers, so this may miss papers and is off by default.
+        """
         start_year = start_date.year
         end_year = end_date.year
-        #search_url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}?fields=affiliations"
-        search_url = f"https://api.semanticscholar.org/graph/v1/author/{author_id}/papers?fields=title,url,year,publicationDate,venue,publicationVenue,openAccessPdf&limit=1000"
-        response = requests.get(search_url)
-        papers = response.json()["data"]
-        output = []
-        for paper in papers:
-            if "year" in paper and paper["year"] != None:
-                info = SemanticScholarPaperInfo()
-                if "publicationDate" in paper and paper["publicationDate"] != None:
-                    info.publication_date = datetime.strptime(paper["publicationDate"], "%Y-%m-%d")
-                info.year = paper["year"]
-                if info.publication_date is not None:
-                    if info.publication_date.year < start_year or info.publication_date.year > end_year:
-                        continue
-                else:
-                    if info.year < start_year or info.year > end_year:
-                        continue
-                info.id = paper["paperId"]
-                info.url = paper["url"]
-                info.title = paper["title"]
-                info.source = paper["venue"]
-                if paper["publicationVenue"] != None:
-                    if "type" in paper["publicationVenue"]:
-                        info.venue = paper["publicationVenue"]["type"]
-                    elif info.source == "arXiv.org":
-                        info.venue = "arXiv"
-
-                if "openAccessPdf" in paper:
-                    info.openAccessPdf = paper["openAccessPdf"]
-                output.append(info)
-            # info = SemanticScholarPaperInfo()
-            # info.year = paper["year"]
-            # info.id = paper["paperId"]
-            # info.url = paper["url"]
-            # info.title = paper["title"]
-            # info.source = paper["venue"]
-            # if paper["publicationVenue"] != None:
-            #     if "type" in paper["publicationVenue"]:
-            #         info.venue = paper["publicationVenue"]["type"]
-            #     elif info.source == "arXiv.org":
-            #         info.venue = "arXiv"
-            # output.append(info)
-        return output
+        search_url = f"{SemanticScholarScraper.DEFAULT_API_URL}/author/{author_id}/papers"
+        offset = 0
+        old_pages = 0
+        while offset is not None:
+            response = SemanticScholarScraper.fetch_engine.get(search_url, params={
+                'fields': SemanticScholarScraper.INTERVAL_PAPER_FIELDS,
+                'offset': offset,
+                'limit': page_size,
+            })
+            page = response.json()
+            page_years = []
+            for paper in page["data"]:
+                info = SemanticScholarScraper.paper_info_from_json(paper)
+                if info is None:
+                    continue
+                year = info.publication_date.year if info.publication_date is not None else info.year
+                page_years.append(year)
+                if start_year <= year <= end_year:
+                    yield info
+            old_pages = old_pages + 1 if page_years and max(page_years) < start_year else 0
+            if stop_after_old_pages is not None and old_pages >= stop_after_old_pages:
+                break
+            offset = page.get("next")
+
+    @staticmethod
+    def get_papers_by_time_interval(author_id: str, start_date: datetime, end_date: datetime):
+        """Returns a list of papers for a given author id and a given time period"""
+        return list(SemanticScholarScraper.iter_papers_by_time_interval(author_id, start_date, end_date))
 
     @staticmethod
     def get_papers_by_name_surname_by_interval(name: str, surname: str, start_date: datetime, end_date: datetime):
         """Returns a list of papers for a given author name and surname and a given time period"""
-        author_id_list = SemanticScholarScraper.get_author_id_list(name, surname)
+        author_id_list = SemanticScholarScraper.resolve_author_ids(f"{name} {surname}")
         results = []
         for id in author_id_list:
             papers =  SemanticScholarScraper.get_papers_by_time_interval(id, start_date, end_date)
@@ -726,21 +696,190 @@ class SemanticScholarScraper:
         name = full_name.split(" ")[0].strip()
         surname = full_name.split(" ")[-1].strip()
         info_array = SemanticScholarScraper.get_papers_by_name_surname_by_interval(name, surname, start_date, end_date)
-        output = {}
         output = []
         for info in info_array:
-            paper_info = AuthorInfo(full_name, eai_url)
-            paper_info.link = info.url
-            paper_info.publication_date = datetime(info.year, 1, 1)
-            paper_info.title = info.title
-            paper_info.data_source = "Semantic Scholar"
-            paper_info.publication = info.source
-            paper_info.type = info.venue
-            paper_info.eai_match = False
-
-            output.append(paper_info)
+            output.append(SemanticScholarScraper.author_info_from_paper_info(info, full_name, eai_url))
         return output
 
+    @staticmethod
+    def author_info_from_paper_info(info: SemanticScholarPaperInfo, full_name: str, eai_url: str) -> AuthorInfo:
+        paper_info = AuthorInfo(full_name, eai_url)
+        paper_info.link = info.url
+        paper_info.publication_date = datetime(info.year, 1, 1)
+        paper_info.title = info.title
+        paper_info.data_source = "Semantic Scholar"
+        paper_info.publication = info.source
+        paper_info.type = info.venue
+        paper_info.eai_match = False
+        return paper_info
+
+    @staticmethod
+    def resolve_author_ids(full_name: str) -> list:
+        """
+        Returns the author ids matching a full name, searched by its first and last
+        word. Names in the resolution table or the override file skip the search.
+        """
+        def search(full_name):
+            name = full_name.split(" ")[0].strip()
+            surname = full_name.split(" ")[-1].strip()
+            return SemanticScholarScraper.get_author_id_list(name, surname, full_name)
+
+        return SemanticScholarScraper.author_id_resolver.resolve(full_name, search)
+
+    @staticmethod
+    def crawl_author_incrementally(
+                full_name: str,
+                eai_url: str,
+                start_date: datetime,
+                end_date: datetime,
+                crawl_state: AuthorCrawlState = None,
+                stop_after_old_pages: int = None
+            ):
+        """
+        Crawls the papers of an author published in a given time period. With a
+        crawl state, the papers an earlier crawl returned are left out, whatever
+        their publication date, so papers Semantic Scholar indexes late are still new.
+        :param stop_after_old_pages: (optional) see iter_papers_by_time_interval.
+        :return: (author ids, AuthorInfo objects of the new papers, ids of the papers seen)
+        """
+        author_ids = SemanticScholarScraper.resolve_author_ids(full_name)
+        seen = SemanticScholarScraper.seen_paper_ids(full_name, crawl_state)
+
+        new_papers = []
+        paper_ids = set()
+        for author_id in author_ids:
+            for info in SemanticScholarScraper.iter_papers_by_time_interval(
+                    author_id, start_date, end_date, stop_after_old_pages=stop_after_old_pages):
+                paper_ids.add(info.id)
+                if info.id not in seen:
+                    seen.add(info.id)
+                    new_papers.append(SemanticScholarScraper.author_info_from_paper_info(info, full_name, eai_url))
+        return author_ids, new_papers, paper_ids
+
+    @staticmethod
+    def seen_paper_ids(full_name: str, crawl_state: AuthorCrawlState = None) -> set:
+        """Returns the ids of the papers earlier crawls of an author returned, empty without a crawl state"""
+        entry = crawl_state.get(full_name) if crawl_state is not None else None
+        return set(entry['paper_ids']) if entry is not None else set()
+
+    @staticmethod
+    def paper_date(paper: dict):
+        """Returns the publication date of a paper from the API, or None"""
+        if paper.get("publicationDate"):
+            return datetime.strptime(paper["publicationDate"], "%Y-%m-%d")
+        return None
+
+    @staticmethod
+    def paper_year(paper: dict):
+        """Returns the publication year of a paper from the API, or None"""
+        publication_date = SemanticScholarScraper.paper_date(paper)
+        return publication_date.year if publication_date is not None else paper.get("year")
+
+    @staticmethod
+    def post_batches(url: str, ids: list, fields: str, batch_size: int) -> tuple:
+        """
+        Posts ids to a batch endpoint in batches of batch_size, concurrently through
+        the fetch engine.
+        :return: (id -> returned record, or None for ids the API does not know;
+            {id: error} for the ids of batches that failed)
+        """
+        def post(batch):
+            response = SemanticScholarScraper.fetch_engine.post(url, params={'fields': fields}, json={'ids': list(batch)})
+            response.raise_for_status()
+            return response.json()
+
+        batches = [tuple(ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)]
+        records = {}
+        errors = {}
+        for batch, results, error in SemanticScholarScraper.fetch_engine.map(post, batches):
+            if error is not None:
+                errors.update((value, error) for value in batch)
+                continue
+            # Results come back in the order of the requested ids
+            records.update(zip(batch, results))
+        return records, errors
+
+    @staticmethod
+    def iter_author_papers_in_bulk(
+                author_names_and_urls: [],
+                start_date: datetime,
+                end_date: datetime,
+                crawl_state: AuthorCrawlState = None,
+                max_attempts: int = 3
+            ):
+        """
+        Crawls the papers of several authors with batch requests and yields
+        (pair, (author ids, AuthorInfo objects of the new papers, ids of the papers
+        seen), error), like iter_author_papers with crawl_author_incrementally.
+
+        The paper lists of all the authors come from POST /author/batch,
+        AUTHOR_BATCH_SIZE authors per request, and the details of the papers in the
+        period from POST /paper/batch, PAPER_BATCH_SIZE papers per request, instead
+        of paging /author/{id}/papers for every author id. A failed batch only fails
+        the authors whose ids or papers it held; they are crawled again in batches of
+        their own, like the failed authors of iter_author_papers.
+        :param max_attempts: crawls of an author before giving up on it.
+        """
+        def crawl_round(pairs):
+            return SemanticScholarScraper.crawl_authors_in_bulk(pairs, start_date, end_date, crawl_state)
+
+        return SemanticScholarScraper.retry_failed_authors(crawl_round, author_names_and_urls, max_attempts)
+
+    @staticmethod
+    def crawl_authors_in_bulk(
+                author_names_and_urls: [],
+                start_date: datetime,
+                end_date: datetime,
+                crawl_state: AuthorCrawlState = None
+            ):
+        """Makes one attempt of iter_author_papers_in_bulk, without retries"""
+        ids_by_pair = {}
+        for pair, author_ids, error in SemanticScholarScraper.fetch_engine.map(
+                lambda pair: SemanticScholarScraper.resolve_author_ids(pair[0]), author_names_and_urls):
+            if error is not None:
+                yield pair, None, error
+            else:
+                ids_by_pair[pair] = author_ids
+
+        all_author_ids = list(dict.fromkeys(author_id for author_ids in ids_by_pair.values() for author_id in author_ids))
+        authors, author_errors = SemanticScholarScraper.post_batches(
+            f"{SemanticScholarScraper.DEFAULT_API_URL}/author/batch", all_author_ids,
+            'papers.year,papers.publicationDate', SemanticScholarScraper.AUTHOR_BATCH_SIZE)
+
+        start_year = start_date.year
+        end_year = end_date.year
+        plans = {}
+        for pair, author_ids in ids_by_pair.items():
+            failed = [author_errors[author_id] for author_id in author_ids if author_id in author_errors]
+            if failed:
+                yield pair, None, failed[0]
+                continue
+            seen = SemanticScholarScraper.seen_paper_ids(pair[0], crawl_state)
+            paper_ids = []
+            for author_id in author_ids:
+                for paper in (authors.get(author_id) or {}).get("papers") or []:
+                    year = SemanticScholarScraper.paper_year(paper)
+                    if year is not None and start_year <= year <= end_year:
+                        paper_ids.append(paper["paperId"])
+            plans[pair] = (author_ids, list(dict.fromkeys(paper_ids)), seen)
+
+        new_ids = list(dict.fromkeys(paper_id for _, paper_ids, seen in plans.values() for paper_id in paper_ids if paper_id not in seen))
+        papers, paper_errors = SemanticScholarScraper.post_batches(
+            f"{SemanticScholarScraper.DEFAULT_API_URL}/paper/batch", new_ids,
+            SemanticScholarScraper.INTERVAL_PAPER_FIELDS, SemanticScholarScraper.PAPER_BATCH_SIZE)
+
+        for pair, (author_ids, paper_ids, seen) in plans.items():
+            failed = [paper_errors[paper_id] for paper_id in paper_ids if paper_id in paper_errors]
+            if failed:
+                yield pair, None, failed[0]
+                continue
+            new_papers = []
+            for paper_id in paper_ids:
+                info = SemanticScholarScraper.paper_info_from_json(papers[paper_id]) if papers.get(paper_id) else None
+                if paper_id not in seen and info is not None:
+                    new_papers.append(SemanticScholarScraper.author_info_from_paper_info(info, pair[0], pair[1]))
+            yield pair, (author_ids, new_papers, set(paper_ids)), None
+
     @staticmethod
     def test_get_papers_by_author():
         output = SemanticScholarScraper.get_papers_by_author_by_interval("Usama Fayyad",
@@ -753,42 +892,127 @@ class SemanticScholarScraper:
                 print(item)
 
     @staticmethod
-    def get_papers(author_names_and_urls: [], start_date: datetime, end_date: datetime, target_folder: str):
+    def iter_author_papers(
+                author_names_and_urls: [],
+                start_date: datetime,
+                end_date: datetime,
+                workers: int = None,
+                max_attempts: int = 3,
+                crawl=None
+            ):
+        """
+        Crawls the papers of several authors concurrently and yields
+        (pair, papers, error) as each author completes.
+
+        Every request goes through the shared fetch engine, so the workers share
+        its per-host rate budget. An author whose crawl fails is retried after the
+        others of its round, up to max_attempts times; error is then the last
+        exception raised for it, and None for authors that succeeded.
+        :param author_names_and_urls: (full name, eai url) pairs.
+        :param workers: number of authors crawled at once, the fetch engine's by default.
+        :param max_attempts: crawls of an author before giving up on it.
+        :param crawl: function crawling one pair, get_papers_by_author_by_interval by default.
         """
-        This method returns a list of AuthorInfo objects for the given authors.
+        if crawl is None:
+            def crawl(pair):
+                return SemanticScholarScraper.get_papers_by_author_by_interval(pair[0], pair[1], start_date, end_date)
+
+        def crawl_round(pairs):
+            return SemanticScholarScraper.fetch_engine.map(crawl, pairs, workers=workers)
+
+        return SemanticScholarScraper.retry_failed_authors(crawl_round, author_names_and_urls, max_attempts)
+
+    @staticmethod
+    def retry_failed_authors(crawl_round, author_names_and_urls: [], max_attempts: int):
+        """
+        Yields the (pair, result, error) tuples of crawl_round(pairs), calling it
+        again with the pairs that failed, up to max_attempts times in all; error is
+        then the last exception raised for a pair, and None for pairs that succeeded.
+        """
+        pending = list(author_names_and_urls)
+        for attempt in range(1, max_attempts + 1):
+            failed = []
+            for pair, result, error in crawl_round(pending):
+                if error is None:
+                    yield pair, result, None
+                elif attempt == max_attempts:
+                    yield pair, None, error
+                else:
+                    print(f"Error processing {pair[0]}, will retry: {error}")
+                    failed.append(pair)
+            if not failed:
+                break
+            pending = failed
+
+    @staticmethod
+    def get_papers(
+                author_names_and_urls: [],
+                start_date: datetime,
+                end_date: datetime,
+                target_folder: str,
+                workers: int = None,
+                incremental: bool = True,
+                bulk: bool = False,
+                stop_after_old_pages: int = None
+            ):
+        """
+        This method crawls the papers of the given authors into AuthorInfo objects.
+        Each author's new papers are pickled as soon as the author finishes, and the
+        crawl state is kept in semantic_scholar_state.jsonl next to them, so a rerun
+        only returns the papers earlier runs did not.
         :param author_names:
         :param data:
         :param start_date:
         :param end_date:
+        :param workers: number of authors crawled at once, the fetch engine's by default.
+        :param incremental: leave out the papers earlier runs returned; False returns every paper of the period.
+        :param bulk: crawl with /author/batch and /paper/batch requests, see iter_author_papers_in_bulk.
+        :param stop_after_old_pages: see iter_papers_by_time_interval; unused by the bulk crawl.
         :return:
         """
-        papers = []
-        count = 0
-        for pair in author_names_and_urls:
-            full_name = pair[0]
-            eai_url = pair[1]
-            try:
-                papers_by_author = SemanticScholarScraper.get_papers_by_author_by_interval(full_name, eai_url, start_date, end_date)
-                print(f"Processed {pair[0]}. Number of articles: {len(papers_by_author)}")
-                papers.extend(papers_by_author)
-                time.sleep(5)
-                # count += 1
-                # if count >= 2:
-                #     break
-            except Exception as e:
-                print(f"Error processing {pair[0]}:")
-                print(e)
-                time.sleep(10)
-
-        for paper in papers:
-            title = paper.title.replace("\n", "").replace("\t", "")
-            print(f"{paper.full_name};{title};{paper.data_source};{paper.type};{paper.link}")
-
         script_path = Path(__file__).resolve()
         base_dir = script_path.parent.parent
         pkl_folder = os.path.join(base_dir, target_folder)
         create_folder_if_not_exists(pkl_folder)
-        serialize(papers, os.path.join(pkl_folder, 'semantic_scholar.pkl'))
+        run_stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+
+        crawl_state = AuthorCrawlState(os.path.join(pkl_folder, 'semantic_scholar_state.jsonl'))
+
+        def crawl(pair):
+            return SemanticScholarScraper.crawl_author_incrementally(
+                pair[0], pair[1], start_date, end_date, crawl_state if incremental else None, stop_after_old_pages)
+
+        if bulk:
+            results = SemanticScholarScraper.iter_author_papers_in_bulk(
+                author_names_and_urls, start_date, end_date, crawl_state if incremental else None)
+        else:
+            results = SemanticScholarScraper.iter_author_papers(
+                author_names_and_urls, start_date, end_date, workers=workers, crawl=crawl)
+
+        papers_by_pair = {}
+        with crawl_state:
+            for pair, result, error in results:
+                if error is not None:
+                    print(f"Error processing {pair[0]}:")
+                    print(error)
+                    continue
+                author_ids, papers_by_author, paper_ids = result
+                print(f"Processed {pair[0]}. Number of new articles: {len(papers_by_author)}")
+                if papers_by_author:
+                    author_file = re.sub(r'\W+', '_', pair[0]).strip('_')
+                    serialize(papers_by_author, os.path.join(pkl_folder, f'semantic_scholar_{author_file}_{run_stamp}.pkl'))
+                crawl_state.update(pair[0], author_ids, start_date, end_date, paper_ids)
+                papers_by_pair[pair] = papers_by_author
+        SemanticScholarScraper.author_id_resolver.close()
+        print(f"Fetch stats: {SemanticScholarScraper.fetch_engine.stats.snapshot()}")
+
+        # In the order of the author list, whatever order the authors completed in
+        papers = [paper for pair in author_names_and_urls for paper in papers_by_pair.get(pair, [])]
+
+        for paper in papers:
+            title = paper.title.replace("\n", "").replace("\t", "")
+            print(f"{paper.full_name};{title};{paper.data_source};{paper.type};{paper.link}")
+        return papers
 
 
     @staticmethod
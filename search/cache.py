@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from common.text import normalize_keyword
+
+
+def normalize_query(start_date, end_date, keywords: dict = None, facets: dict = None, **options) -> tuple:
+    """
+    Returns a hashable key for a search, equal for searches that must return
+    the same rows.
+
+    :param start_date: first publication date to keep.
+    :param end_date: last publication date to keep.
+    :param dict keywords: searched column -> keyword.
+    :param dict facets: facet column -> selected values.
+    :param options: any other search parameters, such as top_k.
+    """
+    return (
+        pd.Timestamp(start_date).isoformat(),
+        pd.Timestamp(end_date).isoformat(),
+        tuple(sorted((column, normalize_keyword(keyword)) for column, keyword in (keywords or {}).items())),
+        tuple(sorted((column, tuple(sorted(set(selected)))) for column, selected in (facets or {}).items())),
+        tuple(sorted(options.items())),
+    )
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of search results with a time-to-live, shared by every
+    session of the process.
+
+    Entries belong to one corpus version; the cache is cleared as soon as it
+    is asked for a different version.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        '''
+        :param int max_entries: (optional) least recently used entries beyond this are evicted.
+        :param float ttl_seconds: (optional) entries older than this are recomputed.
+        '''
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: tuple):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, version: str, key: tuple, result) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, version: str, key: tuple, compute):
+        """Returns the cached result for key, calling compute() and caching its result on a miss"""
+        result = self.get(version, key)
+        if result is None:
+            result = compute()
+            # The result is shared between sessions, so it must not be modified
+            result.positions.flags.writeable = False
+            self.put(version, key, result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from search.index import DEFAULT_MIN_SCORE
+
+
+class SearchResult:
+    """
+    Stores the outcome of a search
+    """
+    def __init__(self, positions: np.ndarray, facet_counts: dict):
+        # Ascending row positions into the corpus
+        self.positions = positions
+        # Facet name -> {value: number of hits if only that value were selected}
+        self.facet_counts = facet_counts
+
+    def __len__(self):
+        return len(self.positions)
+
+
+def positions_to_mask(positions: np.ndarray, n_rows: int) -> np.ndarray:
+    """Returns a boolean mask of length n_rows that is True at the given row positions"""
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+def date_range(dates: pd.Series, start_date, end_date):
+    """
+    Returns the [start, stop) row positions of the rows published between
+    start_date and end_date (inclusive) with two binary searches.
+
+    The dates must be sorted ascending with missing dates last, as they are
+    in the corpus store.
+    """
+    values = dates.to_numpy()
+    start = np.searchsorted(values, np.datetime64(pd.Timestamp(start_date)), side='left')
+    stop = np.searchsorted(values, np.datetime64(pd.Timestamp(end_date)), side='right')
+    return int(start), max(int(start), int(stop))
+
+
+def keyword_mask(index, query: str, start: int, stop: int, top_k: int = None,
+                 min_score: float = DEFAULT_MIN_SCORE) -> np.ndarray:
+    """
+    Returns a boolean mask over rows [start, stop) of the (at most top_k)
+    rows whose indexed column is similar to the query.
+    """
+    positions = index.search(query, top_k=top_k, min_score=min_score)
+    positions = positions[(positions >= start) & (positions < stop)]
+    return positions_to_mask(positions - start, stop - start)
+
+
+def filter_rows(data: pd.DataFrame, start_date, end_date, keyword_searches=(), facets=(),
+                top_k: int = None, min_score: float = DEFAULT_MIN_SCORE) -> SearchResult:
+    """
+    Runs a search over the data and returns the row positions of the matches.
+
+    The date window is looked up first, and the keyword and facet filters
+    only look at the rows inside it. Each facet is also counted over the
+    hits of all the other filters, which is what that facet's checkboxes
+    would return.
+
+    :param data: the corpus, sorted by publication_date; every index in
+        keyword_searches must have been built over its rows in the same order.
+    :param start_date: first publication date to keep.
+    :param end_date: last publication date to keep.
+    :param keyword_searches: (SearchIndex, query) pairs; empty queries are skipped.
+    :param facets: (FacetIndex, selected values) pairs; empty selections match every row.
+    :param int top_k: (optional) keep at most this many matches per keyword search.
+    :param float min_score: (optional) minimum similarity for a keyword match.
+    :returns: the matches as a :class:`SearchResult`.
+    """
+    start, stop = date_range(data['publication_date'], start_date, end_date)
+    mask = np.ones(stop - start, dtype=bool)
+    for index, query in keyword_searches:
+        if query:
+            mask &= keyword_mask(index, query, start, stop, top_k=top_k, min_score=min_score)
+
+    facet_masks = [facet.mask(selected, start, stop) if selected else None for facet, selected in facets]
+    facet_counts = {}
+    for i, (facet, _) in enumerate(facets):
+        others = mask.copy()
+        for j, facet_mask in enumerate(facet_masks):
+            if j != i and facet_mask is not None:
+                others &= facet_mask
+        facet_counts[facet.name] = facet.counts(np.flatnonzero(others) + start)
+
+    for facet_mask in facet_masks:
+        if facet_mask is not None:
+            mask &= facet_mask
+    return SearchResult(np.flatnonzero(mask) + start, facet_counts)
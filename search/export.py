@@ -0,0 +1,115 @@
+"""
+On-demand export of search results.
+
+Exports are written from the typed corpus columns in chunks of rows, so
+neither a full copy of the results nor the whole encoded file is held in
+memory while writing. Files are cached on disk by a hash of the corpus
+version, result rows and format, so the same results are only encoded once.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.files import atomic_path
+
+# Format -> (file extension, mime type, label)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv', 'CSV'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet', 'Parquet'),
+    'jsonl': ('jsonl', 'application/jsonl', 'JSON Lines'),
+}
+
+EXPORT_CHUNK_SIZE = 50_000
+
+# Oldest cached exports beyond this many files are removed
+MAX_CACHED_EXPORTS = 32
+
+
+def export_key(corpus_version: str, positions: np.ndarray, fmt: str) -> str:
+    digest = hashlib.sha256(f"{corpus_version}:{fmt}:".encode('utf-8'))
+    digest.update(np.ascontiguousarray(positions, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:24]
+
+
+def iter_chunks(data: pd.DataFrame, positions: np.ndarray, chunk_size: int = EXPORT_CHUNK_SIZE):
+    for offset in range(0, len(positions), chunk_size):
+        yield data.iloc[positions[offset:offset + chunk_size]]
+
+
+def write_export(data: pd.DataFrame, positions: np.ndarray, file_path: str, fmt: str,
+                 chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """Writes the given rows of data to file_path, one chunk of rows at a time"""
+    if fmt == 'parquet':
+        schema = pa.Schema.from_pandas(data.iloc[:0], preserve_index=False)
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for chunk in iter_chunks(data, positions, chunk_size):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return
+
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            data.iloc[:0].to_csv(f, index=False)
+            for chunk in iter_chunks(data, positions, chunk_size):
+                chunk.to_csv(f, index=False, header=False)
+        elif fmt == 'jsonl':
+            for chunk in iter_chunks(data, positions, chunk_size):
+                if len(chunk):
+                    lines = chunk.to_json(orient='records', lines=True, date_format='iso')
+                    # Older pandas versions omit the trailing newline
+                    f.write(lines if lines.endswith('\n') else lines + '\n')
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def open_export(data: pd.DataFrame, corpus_version: str, positions: np.ndarray, fmt: str, export_dir: str):
+    """
+    Opens the export of the given rows for reading, writing it first if it is
+    not cached yet or was evicted. The open file stays readable if another
+    session evicts it afterwards.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    extension = EXPORT_FORMATS[fmt][0]
+    file_path = os.path.join(export_dir, f"{export_key(corpus_version, positions, fmt)}.{extension}")
+    try:
+        f = open(file_path, 'rb')
+    except FileNotFoundError:
+        # Sessions exporting the same rows at once each write their own temporary file
+        with atomic_path(file_path) as tmp_path:
+            write_export(data, positions, tmp_path, fmt)
+            f = open(tmp_path, 'rb')
+        _evict_old_exports(export_dir)
+        return f
+    try:
+        # Mark as recently used, so eviction removes the least recently downloaded exports
+        os.utime(file_path)
+    except FileNotFoundError:
+        pass
+    return f
+
+
+def read_export(data: pd.DataFrame, corpus_version: str, positions: np.ndarray, fmt: str, export_dir: str) -> bytes:
+    """Returns the contents of the export of the given rows, see open_export"""
+    with open_export(data, corpus_version, positions, fmt, export_dir) as f:
+        return f.read()
+
+
+def _evict_old_exports(export_dir: str) -> None:
+    exports = []
+    for entry in os.scandir(export_dir):
+        if entry.name.endswith('.tmp'):
+            continue
+        try:
+            exports.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            # Removed by a concurrent eviction
+            continue
+    exports.sort(reverse=True)
+    for _, path in exports[MAX_CACHED_EXPORTS:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
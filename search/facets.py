@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+class FacetIndex:
+    """
+    Precomputed bitmaps for a categorical column such as data_source or type.
+
+    Every facet value gets a boolean array over the corpus rows, so selecting
+    values is an OR of bitmaps instead of a string comparison over the whole
+    column, and counting the values of a result set is one bincount.
+    """
+
+    def __init__(self, name: str, column: pd.Series):
+        '''
+        :param str name: column name, used as the key of the facet counts.
+        :param column: categorical column the bitmaps are built from.
+        '''
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype('category')
+        self.name = name
+        self.values = [str(value) for value in column.cat.categories]
+        self.codes = column.cat.codes.to_numpy()
+        self.bitmaps = {value: self.codes == code for code, value in enumerate(self.values)}
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.codes)
+
+    def mask(self, selected, start: int = 0, stop: int = None) -> np.ndarray:
+        """Returns a boolean mask over rows [start, stop) of the rows having one of the selected values"""
+        stop = self.n_rows if stop is None else stop
+        mask = np.zeros(stop - start, dtype=bool)
+        for value in selected:
+            if value in self.bitmaps:
+                mask |= self.bitmaps[value][start:stop]
+        return mask
+
+    def counts(self, positions: np.ndarray = None) -> dict:
+        """Returns value -> number of rows with that value, among the given row positions (all rows by default)"""
+        codes = self.codes if positions is None else self.codes[positions]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values))
+        return dict(zip(self.values, counts.tolist()))
@@ -0,0 +1,186 @@
+import hashlib
+import os
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from common.files import atomic_write, file_lock
+
+# Bump whenever the on-disk layout of a saved index changes
+INDEX_FORMAT_VERSION = 1
+
+# Documents scoring at or below this cosine similarity are not considered a match
+DEFAULT_MIN_SCORE = 0.1
+
+# Queries matching more than 1/DENSE_ACCUMULATOR_RATIO postings per document are
+# accumulated in a corpus-sized array instead of sorting the matches
+DENSE_ACCUMULATOR_RATIO = 8
+
+
+def top_k_positions(positions: np.ndarray, scores: np.ndarray, top_k: int = None,
+                    min_score: float = DEFAULT_MIN_SCORE) -> np.ndarray:
+    """
+    Returns the positions whose score is above min_score, best first.
+
+    Only the top_k best are partially selected with argpartition before the
+    final sort, so the work is linear in the number of candidates rather than
+    O(n log n) over all of them.
+
+    :param np.ndarray positions: candidate row positions.
+    :param np.ndarray scores: score of each candidate, aligned with positions.
+    :param int top_k: (optional) maximum number of positions to return.
+    :param float min_score: (optional) scores must be strictly greater than this.
+    """
+    keep = scores > min_score
+    positions, scores = positions[keep], scores[keep]
+    if top_k is not None and len(positions) > top_k:
+        if top_k <= 0:
+            return positions[:0]
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        positions, scores = positions[best], scores[best]
+    return positions[np.argsort(-scores, kind='stable')]
+
+
+def content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns a short sha256 digest of the contents of a file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class SearchIndex:
+    """
+    TF-IDF inverted index over a single text column.
+
+    The postings are kept as a CSC matrix (documents x terms), so the
+    documents containing a term are one contiguous slice of
+    ``postings.indices`` and a query only touches the columns of its terms.
+    Document rows are L2-normalized, as in ``TfidfVectorizer``, so the dot
+    product with a normalized query vector is the cosine similarity.
+    """
+
+    def __init__(self, vocabulary: dict, idf: np.ndarray, postings: sp.csc_matrix, version: str):
+        '''
+        :param dict vocabulary: term -> column in ``postings``.
+        :param np.ndarray idf: inverse document frequency per column.
+        :param postings: documents x terms TF-IDF matrix in CSC format.
+        :param str version: content hash of the data the index was built from.
+        '''
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.postings = postings
+        self.version = version
+        self._analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+
+    @property
+    def n_docs(self) -> int:
+        return self.postings.shape[0]
+
+    @classmethod
+    def build(cls, column_data, version: str) -> 'SearchIndex':
+        """Fits the vocabulary and postings for the given column"""
+        vectorizer = TfidfVectorizer(stop_words='english')
+        vectors = vectorizer.fit_transform(column_data)
+        return cls(vectorizer.vocabulary_, vectorizer.idf_, vectors.tocsc(), version)
+
+    def save(self, file_path: str) -> None:
+        terms = np.empty(len(self.vocabulary), dtype=object)
+        for term, column in self.vocabulary.items():
+            terms[column] = term
+        # Replaced atomically so a concurrent reader never sees a partial file
+        with atomic_write(file_path, 'wb') as f:
+            np.savez(
+                f,
+                format_version=np.int64(INDEX_FORMAT_VERSION),
+                version=np.str_(self.version),
+                terms=terms.astype(str),
+                idf=self.idf,
+                data=self.postings.data,
+                indices=self.postings.indices,
+                indptr=self.postings.indptr,
+                shape=np.asarray(self.postings.shape, dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> 'SearchIndex':
+        with np.load(file_path, allow_pickle=False) as f:
+            if int(f['format_version']) != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported search index format in {file_path}")
+            postings = sp.csc_matrix(
+                (f['data'], f['indices'], f['indptr']), shape=tuple(f['shape']))
+            vocabulary = {term: column for column, term in enumerate(f['terms'].tolist())}
+            return cls(vocabulary, f['idf'], postings, str(f['version']))
+
+    @classmethod
+    def load_or_build(cls, index_dir: str, name: str, version: str, column_data) -> 'SearchIndex':
+        """
+        Loads the index saved for ``name`` at ``version``, building and saving
+        it first if it does not exist yet.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        file_path = os.path.join(index_dir, f"{name}-{version}.npz")
+        index = cls._try_load(file_path)
+        if index is None:
+            with file_lock(f"{file_path}.lock"):
+                # Another process may have built it while this one waited
+                index = cls._try_load(file_path)
+                if index is None:
+                    index = cls.build(column_data, version)
+                    index.save(file_path)
+        return index
+
+    @classmethod
+    def _try_load(cls, file_path: str):
+        if os.path.exists(file_path):
+            try:
+                return cls.load(file_path)
+            except (ValueError, KeyError, OSError) as e:
+                print(f"Rebuilding search index {file_path}: {e}")
+        return None
+
+    def query_vector(self, query: str):
+        """Returns the (term columns, weights) of the L2-normalized query vector"""
+        counts = Counter(term for term in self._analyzer(query) if term in self.vocabulary)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        term_ids = np.fromiter((self.vocabulary[term] for term in counts), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[term_ids]
+        return term_ids, weights / np.linalg.norm(weights)
+
+    def score(self, query: str):
+        """
+        Returns the cosine similarity between the query and every document
+        sharing at least one term with it, as a compact (positions, scores)
+        pair with ascending positions.
+
+        Only the postings of the query terms are walked, so time and memory
+        are proportional to the number of matching postings, not the corpus.
+        """
+        term_ids, weights = self.query_vector(query)
+        if len(term_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        indptr, indices, data = self.postings.indptr, self.postings.indices, self.postings.data
+        starts, ends = indptr[term_ids], indptr[term_ids + 1]
+        docs = np.concatenate([indices[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([
+            data[start:end] * weight for start, end, weight in zip(starts, ends, weights)])
+        if len(term_ids) == 1:
+            return docs.astype(np.int64), contributions
+        # Accumulate the per-term contributions of documents that share several query terms.
+        # Sorting the matches is cheaper than a corpus-sized accumulator unless most documents match.
+        if len(docs) * DENSE_ACCUMULATOR_RATIO < self.n_docs:
+            positions, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions, minlength=len(positions))
+            return positions.astype(np.int64), scores
+        dense = np.bincount(docs, weights=contributions, minlength=self.n_docs)
+        positions = np.flatnonzero(dense)
+        return positions, dense[positions]
+
+    def search(self, query: str, top_k: int = None, min_score: float = DEFAULT_MIN_SCORE) -> np.ndarray:
+        """Returns the row positions of the (at most top_k) documents scoring above min_score, best first"""
+        positions, scores = self.score(query)
+        return top_k_positions(positions, scores, top_k, min_score)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+# Function to create a hyperlink for the title
+def make_clickable(title, link):
+    if pd.notna(link):
+        return f'<a href="{link}" target="_blank">{title}</a>'
+    return title  # Return just the title if link is not available
+
+
+def total_pages(n_results: int, page_size: int) -> int:
+    return (n_results + page_size - 1) // page_size
+
+
+def page_positions(positions: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """Returns the row positions shown on the given page"""
+    return positions[page * page_size:(page + 1) * page_size]
+
+
+def format_page(data: pd.DataFrame, positions: np.ndarray, columns) -> pd.DataFrame:
+    """
+    Formats only the given rows for display: title links, newline cleanup
+    and string conversion, so the cost is proportional to the page size and
+    not to the number of results.
+    """
+    page_data = data.iloc[positions]
+    formatted = pd.DataFrame(index=page_data.index)
+    for column in columns:
+        if column == 'title' and 'link' in page_data.columns:
+            values = pd.Series(
+                [make_clickable(title, link) for title, link in zip(page_data['title'], page_data['link'])],
+                index=page_data.index, dtype=object)
+        else:
+            values = page_data[column]
+        # Clean up special characters
+        formatted[column] = values.astype(str).str.replace(r'[\n\r]', ' ', regex=True)
+    return formatted
+
+
+def render_page_html(data: pd.DataFrame, positions: np.ndarray, columns) -> str:
+    """Returns the HTML table of the given rows, with clickable titles"""
+    return format_page(data, positions, columns).to_html(index=False, escape=False)
@@ -0,0 +1,149 @@
+"""
+Columnar on-disk store for the search corpus.
+
+The cleaned corpus is written once as an uncompressed Arrow IPC file with
+typed columns (datetime64 publication dates, dictionary-encoded facets,
+Arrow string columns) and memory-mapped on startup. Rows are sorted by
+publication date (missing dates last), so a date window is a contiguous
+range of rows. Mapped pages are shared
+by every Streamlit worker on the host instead of each parsing its own copy
+of the CSV.
+
+Build the store ahead of time with:
+
+    python -m search.store val.csv corpus_store dblp
+"""
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+from common.files import atomic_path, file_lock
+from search.index import content_hash
+
+# Bump whenever the cleaning rules or the on-disk layout change
+STORE_FORMAT_VERSION = 2
+
+DATE_COLUMN = 'publication_date'
+CATEGORICAL_COLUMNS = ('data_source', 'type')
+
+_METADATA_KEY = b'corpus_store'
+
+
+def clean_corpus(df: pd.DataFrame, drop_sources=()) -> pd.DataFrame:
+    """
+    Applies the cleaning the apps used to repeat on every load: typed dates,
+    filled and stripped strings, rows sorted by publication date.
+    """
+    if drop_sources and 'data_source' in df.columns:
+        df = df[~df['data_source'].isin(drop_sources)]
+    df = df.copy()
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format='mixed', errors='coerce')
+    df = df.sort_values(DATE_COLUMN, kind='stable', na_position='last').reset_index(drop=True)
+    for column in df.columns:
+        if column == DATE_COLUMN or pd.api.types.is_numeric_dtype(df[column]):
+            continue
+        values = df[column].fillna('N/A').astype(str)
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = values.str.strip().astype('category')
+        else:
+            df[column] = values
+    return df
+
+
+def write_corpus_store(df: pd.DataFrame, store_path: str, metadata: dict) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(metadata).encode('utf-8'),
+    })
+    # No compression, so the file can be mapped and read in place
+    with atomic_path(store_path) as tmp_path:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+def read_store_metadata(store_path: str) -> dict:
+    """Reads the metadata of a corpus store without mapping its columns"""
+    with pa.memory_map(store_path, 'r') as source:
+        return json.loads(pa.ipc.open_file(source).schema.metadata[_METADATA_KEY])
+
+
+def open_corpus_store(store_path: str):
+    """
+    Memory-maps a corpus store.
+
+    :returns: (DataFrame, metadata dict). String columns stay backed by the
+        mapped Arrow buffers rather than being copied into Python objects.
+    """
+    source = pa.memory_map(store_path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    metadata = json.loads(table.schema.metadata[_METADATA_KEY])
+    string_dtype = pd.StringDtype('pyarrow')
+    df = table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get)
+    return df, metadata
+
+
+def _source_stat(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def build_corpus_store(csv_path: str, store_path: str, drop_sources=()) -> dict:
+    """Cleans the CSV and writes it to store_path, returning the store metadata"""
+    digest = hashlib.sha256(
+        f"{content_hash(csv_path)}:{sorted(drop_sources)}:{STORE_FORMAT_VERSION}".encode('utf-8'))
+    metadata = {
+        'format_version': STORE_FORMAT_VERSION,
+        'version': digest.hexdigest()[:16],
+        'source': _source_stat(csv_path),
+        'drop_sources': sorted(drop_sources),
+    }
+    df = clean_corpus(pd.read_csv(csv_path), drop_sources)
+    write_corpus_store(df, store_path, metadata)
+    return metadata
+
+
+def _is_current(store_path: str, csv_path: str, drop_sources) -> bool:
+    if not os.path.exists(store_path):
+        return False
+    metadata = read_store_metadata(store_path)
+    return (metadata.get('format_version') == STORE_FORMAT_VERSION
+            and metadata.get('source') == _source_stat(csv_path)
+            and metadata.get('drop_sources') == sorted(drop_sources))
+
+
+def load_corpus(csv_path: str, store_dir: str, drop_sources=()):
+    """
+    Memory-maps the store built from csv_path, building it first if it is
+    missing or the CSV changed since it was built. Processes starting
+    together build the store once: the others wait for the build lock and
+    then map the finished store.
+
+    :returns: (DataFrame, version). The version identifies the corpus
+        contents and row order, and is what derived indexes are keyed on.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    store_path = os.path.join(store_dir, f"{name}.arrow")
+    if not _is_current(store_path, csv_path, drop_sources):
+        with file_lock(f"{store_path}.lock"):
+            # Another process may have built it while this one waited
+            if not _is_current(store_path, csv_path, drop_sources):
+                print(f"Building corpus store {store_path}")
+                build_corpus_store(csv_path, store_path, drop_sources)
+    df, metadata = open_corpus_store(store_path)
+    return df, metadata['version']
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m search.store <csv_path> <store_dir> [dropped_source ...]")
+        sys.exit(1)
+    data, version = load_corpus(sys.argv[1], sys.argv[2], sys.argv[3:])
+    print(f"Corpus store for {sys.argv[1]}: {len(data)} rows, version {version}")
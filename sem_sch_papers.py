@@ -21,11 +21,11 @@ base_dir = script_path.parent.parent
 new_target_folder_path = os.path.join(base_dir, "new_pkl_files")
 os.makedirs(new_target_folder_path, exist_ok=True)
 
-# Define date range for scraping
+# Define date range for scraping; reruns only fetch papers newer than each author's last crawl
 start_date = dt.datetime(2024, 8, 13)
-end_date = dt.datetime(2024, 12, 4)
+end_date = dt.datetime.now()
 
-# Run Semantic Scholar scraper and save only new files
+# Run Semantic Scholar scraper; each author's new papers are saved to their own file as soon as the author finishes
 SemanticScholarScraper.get_papers(author_list, start_date, end_date, new_target_folder_path)
 
 # Load only new papers
@@ -1,84 +1,39 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import os
 import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Function to compute TF-IDF vectors and save them as a .pkl file
-def compute_and_save_tfidf(data, pkl_file_path):
-    with st.spinner("Precomputing TF-IDF vectors..."):
-        # Compute TF-IDF for titles
-        title_vectorizer = TfidfVectorizer(stop_words="english")
-        title_vectors = title_vectorizer.fit_transform(data["title"].fillna(""))
-
-        # Compute TF-IDF for authors
-        author_vectorizer = TfidfVectorizer(stop_words="english")
-        author_vectors = author_vectorizer.fit_transform(data["authors"].fillna(""))
-
-        # Save everything into a .pkl file
-        data_dict = {
-            "data": data,
-            "title_vectorizer": title_vectorizer,
-            "title_vectors": title_vectors,
-            "author_vectorizer": author_vectorizer,
-            "author_vectors": author_vectors,
-        }
-        with open(pkl_file_path, "wb") as f:
-            joblib.dump(data_dict, f)
-        st.success("TF-IDF vectors precomputed and saved!")
-
-# Function to load precomputed data from the .pkl file
+
+from search.cache import QueryCache, normalize_query
+from search.core import filter_rows
+from search.index import SearchIndex
+from search.render import page_positions, render_page_html, total_pages
+from search.store import load_corpus
+
+# Function to load the prebuilt search index for a column, building it once per corpus version
+@st.cache_resource
+def load_search_index(corpus_version, column, _column_data):
+    return SearchIndex.load_or_build(search_index_dir, column, corpus_version, _column_data)
+
+# Function to get the search result cache shared by all sessions of this process
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(max_entries=256, ttl_seconds=3600)
+
+# Function to memory-map the columnar corpus store, building it from the CSV when it is missing or stale
 @st.cache_resource
-def load_precomputed_data(pkl_file_path):
-    with open(pkl_file_path, "rb") as f:
-        data_dict = joblib.load(f)
-    return (
-        data_dict["data"],
-        data_dict["title_vectorizer"],
-        data_dict["title_vectors"],
-        data_dict["author_vectorizer"],
-        data_dict["author_vectors"],
-    )
-
-# Function to find similar entries using precomputed TF-IDF vectors
-def find_similar_entries(query, vectorizer, vectors):
-    query_vector = vectorizer.transform([query])
-    cosine_similarities = cosine_similarity(query_vector, vectors).flatten()
-    similar_indices = cosine_similarities.argsort()[::-1]
-    return similar_indices[cosine_similarities[similar_indices] > 0.1]
-
-# Function to create a hyperlink for the title
-def make_clickable(title, link):
-    if pd.notna(link):
-        return f'<a href="{link}" target="_blank">{title}</a>'
-    return title  # Return just the title if link is not available
-
-# Function to load CSV data
-@st.cache_data
 def load_data(file_path):
-    df = pd.read_csv(file_path)
-    df["publication_date"] = pd.to_datetime(df["publication_date"], format="mixed", errors="coerce")
-    df.fillna("N/A", inplace=True)
-    return df
+    return load_corpus(file_path, corpus_store_dir)
 
 # Streamlit app interface
 st.sidebar.title("Enter Search Parameters")
 
 # CSV file path (replace with your file)
 csv_file_path = "combined_schema.csv"
-data = load_data(csv_file_path)
-
-# Local .pkl file path
-pkl_file_path = "tfidf_data.pkl"
+corpus_store_dir = "corpus_store"
+search_index_dir = "search_index"
+data, corpus_version = load_data(csv_file_path)
 
-# Check if the .pkl file exists, and create it if not
-if not os.path.exists(pkl_file_path):
-    compute_and_save_tfidf(data, pkl_file_path)
-
-# Load the precomputed data
-data, title_vectorizer, title_vectors, author_vectorizer, author_vectors = load_precomputed_data(pkl_file_path)
+# Load the search indexes for titles and authors
+title_index = load_search_index(corpus_version, "title", data["title"])
+author_index = load_search_index(corpus_version, "authors", data["authors"])
 
 # Determine dynamic default values for the date picker
 min_date = data['publication_date'].min().date()
@@ -105,34 +60,32 @@ if 'page' not in st.session_state:
 # Search button
 if st.sidebar.button("Search"):
     with st.spinner("Filtering data..."):
-        mask = (data['publication_date'] >= pd.Timestamp(start_date)) & (data['publication_date'] <= pd.Timestamp(end_date))
-        
-        if title_keyword:
-            similar_title_indices = find_similar_entries(title_keyword, title_vectorizer, title_vectors)
-            mask &= data.index.isin(similar_title_indices)
-
-        if author_keyword:
-            similar_author_indices = find_similar_entries(author_keyword, author_vectorizer, author_vectors)
-            mask &= data.index.isin(similar_author_indices)
-
-        filtered_data = data[mask]
-        st.session_state['filtered_data'] = filtered_data
+        query_cache = get_query_cache()
+        query_key = normalize_query(start_date, end_date, keywords={"title": title_keyword, "authors": author_keyword})
+        result = query_cache.get_or_compute(corpus_version, query_key, lambda: filter_rows(
+            data, start_date, end_date,
+            keyword_searches=[(title_index, title_keyword), (author_index, author_keyword)],
+        ))
+        st.session_state['positions'] = result.positions
+        st.session_state['corpus_version'] = corpus_version
         st.session_state['page'] = 0
 
+# Hit and miss counters of the result cache shared by all sessions
+with st.sidebar.expander("Result cache"):
+    cache_stats = get_query_cache().stats()
+    st.caption(f"{cache_stats['hits']} hits, {cache_stats['misses']} misses "
+               f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} cached searches")
+
 # Display results
 st.markdown("<h1 style='text-align: center;'>Filtered Results</h1>", unsafe_allow_html=True)
-if 'filtered_data' in st.session_state:
-    filtered_data = st.session_state['filtered_data'].copy()
-    filtered_data["title"] = filtered_data.apply(lambda x: make_clickable(x["title"], x["link"]), axis=1)
-    filtered_data.replace({r'\n': ' ', r'\r': ' '}, regex=True, inplace=True)
-    filtered_data = filtered_data.astype(str)
+if 'positions' in st.session_state and st.session_state.get('corpus_version') == corpus_version:
+    positions = st.session_state['positions']
 
     page_size = 100
-    total_pages = (len(filtered_data) + page_size - 1) // page_size
+    n_pages = total_pages(len(positions), page_size)
     page = st.session_state['page']
 
-    paginated_data = filtered_data.iloc[page * page_size:(page + 1) * page_size]
-    paginated_data_html = paginated_data[["title", "authors", "publication_date"]].to_html(index=False, escape=False)
+    paginated_data_html = render_page_html(data, page_positions(positions, page, page_size), ["title", "authors", "publication_date"])
     st.markdown(paginated_data_html, unsafe_allow_html=True)
 
     col1, col2 = st.columns([1, 1])
@@ -143,7 +96,7 @@ if 'filtered_data' in st.session_state:
                 st.rerun()
     with col2:
         if st.button("Next"):
-            if st.session_state['page'] < total_pages - 1:
+            if st.session_state['page'] < n_pages - 1:
                 st.session_state['page'] += 1
                 st.rerun()
 else:
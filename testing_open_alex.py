@@ -1,13 +1,20 @@
-import requests
 import pandas as pd
-import time
+
+from scrapers.fetch import FetchEngine
+from scrapers.http_cache import ResponseCache
+
+# Rate limited, with retries; responses are cached on disk for a day
+fetch_engine = FetchEngine(
+    rate_limits={'api.openalex.org': 1.0},
+    cache=ResponseCache('http_cache', ttl_seconds={'https://api.openalex.org/': 24 * 3600})
+)
 
 def get_author_ids(name):
     """Get a list of author IDs and names by author name."""
     base_url = "https://api.openalex.org/authors"
     query = f"search={name}"
     url = f"{base_url}?{query}"
-    response = requests.get(url)
+    response = fetch_engine.get(url)
     if response.status_code == 200:
         results = response.json().get('results', [])
         return [(author['id'], author['display_name']) for author in results]
@@ -18,7 +25,7 @@ def get_author_ids(name):
 def get_author_works(author_id):
     """Get a list of works for a given author ID."""
     url = f"https://api.openalex.org/works?filter=author.id:{author_id}"
-    response = requests.get(url)
+    response = fetch_engine.get(url)
     if response.status_code == 200:
         return response.json().get('results', [])
     else:
@@ -51,12 +58,12 @@ def main():
                     "DOI": external_ids.get('doi', 'N/A'),
                     "MAG ID": external_ids.get('mag', 'N/A')
                 })
-        time.sleep(10)  # To respect API rate limits
 
     # Create a DataFrame and save to CSV
     df = pd.DataFrame(author_results)
     df.to_csv("author_works.csv", index=False)
     print("Results saved to 'author_works.csv'.")
+    print(f"Fetch stats: {fetch_engine.stats.snapshot()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+"""
+In-memory stand-in for the Semantic Scholar endpoints the crawler calls,
+used as the session of the scraper's fetch engine.
+"""
+import json
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+
+
+def paper(paper_id: str, publication_date: str) -> dict:
+    """Returns an API paper record published on publication_date (YYYY-MM-DD)"""
+    return {
+        'paperId': paper_id,
+        'year': datetime.strptime(publication_date, '%Y-%m-%d').year,
+        'publicationDate': publication_date,
+        'url': f"https://www.semanticscholar.org/paper/{paper_id}",
+        'title': f"Paper {paper_id}",
+        'venue': 'arXiv.org',
+        'publicationVenue': None,
+    }
+
+
+class FakeSemanticScholar:
+    """
+    Serves /author/{id}/papers pages, POST /author/batch and POST
+    /paper/batch from papers_by_author (author id -> paper records), and
+    records every request. Batches containing one of failing_ids get a 500,
+    the first ``failures`` times if given, always otherwise.
+    """
+
+    def __init__(self, papers_by_author: dict, failing_ids=(), failures: int = None):
+        self.papers_by_author = papers_by_author
+        self.failing_ids = set(failing_ids)
+        self.failures = failures
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def requests_to(self, endpoint: str) -> list:
+        """Returns the recorded requests to an endpoint, e.g. 'author/batch'"""
+        return [request for request in self.requests if request[0] == endpoint]
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        endpoint = urlsplit(url).path.split('/graph/v1/')[1]
+        ids = list(json['ids']) if json else None
+        with self._lock:
+            self.requests.append((endpoint, ids))
+            fail = bool(ids and self.failing_ids.intersection(ids)) and self.failures != 0
+            if fail and self.failures is not None:
+                self.failures -= 1
+        if fail:
+            return self._response(url, 500, {'error': 'Internal Server Error'})
+
+        papers = {record['paperId']: record for records in self.papers_by_author.values() for record in records}
+        if endpoint == 'author/batch':
+            body = [{'authorId': author_id, 'papers': self.papers_by_author[author_id]}
+                    if author_id in self.papers_by_author else None for author_id in ids]
+        elif endpoint == 'paper/batch':
+            body = [papers.get(paper_id) for paper_id in ids]
+        else:
+            author_id = endpoint.split('/')[1]
+            offset, limit = int(params['offset']), int(params['limit'])
+            records = self.papers_by_author.get(author_id, [])
+            body = {'offset': offset, 'data': records[offset:offset + limit]}
+            if offset + limit < len(records):
+                body['next'] = offset + limit
+        return self._response(url, 200, body)
+
+    @staticmethod
+    def _response(url, status_code, body):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        response._content = json.dumps(body).encode('utf-8')
+        return response
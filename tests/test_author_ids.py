@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scrapers.author_ids import AuthorIdResolver
+
+
+class AuthorIdResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.table_path = os.path.join(self.directory.name, 'author_ids.jsonl')
+        self.overrides_path = os.path.join(self.directory.name, 'author_id_overrides.json')
+        self.searches = []
+
+    def search(self, full_name):
+        self.searches.append(full_name)
+        return ['7', '7', '8']
+
+    def resolver(self, overrides: dict = None) -> AuthorIdResolver:
+        if overrides is not None:
+            with open(self.overrides_path, 'w', encoding='utf-8') as f:
+                json.dump(overrides, f)
+        return AuthorIdResolver(self.table_path, overrides_path=self.overrides_path)
+
+    def test_overrides_take_a_single_id_or_a_list(self):
+        with self.resolver({'Ada  Lovelace': '12345', 'Alan Turing': ['1', 2]}) as resolver:
+            self.assertEqual(resolver.resolve('ada lovelace', self.search), ['12345'])
+            self.assertEqual(resolver.resolve('Alan Turing', self.search), ['1', '2'])
+        self.assertEqual(self.searches, [])
+
+    def test_invalid_override_raises(self):
+        for ids in ({'id': '1'}, [['1']], None, True):
+            with self.subTest(ids=ids):
+                resolver = self.resolver({'Ada Lovelace': ids})
+                with self.assertRaisesRegex(ValueError, 'Ada Lovelace'):
+                    resolver.cached('Ada Lovelace')
+
+    def test_resolutions_are_kept_across_runs(self):
+        with self.resolver() as resolver:
+            self.assertEqual(resolver.resolve('Grace Hopper', self.search), ['7', '8'])
+            self.assertEqual(resolver.resolve('grace  hopper', self.search), ['7', '8'])
+        with self.resolver() as resolver:
+            self.assertEqual(resolver.resolve('Grace Hopper', self.search), ['7', '8'])
+        self.assertEqual(self.searches, ['Grace Hopper'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from scrapers.author_ids import AuthorIdResolver
+from scrapers.semantic_scholar_scraper.semantic_scholar_scraper import SemanticScholarScraper
+from tests.fake_semantic_scholar import FakeSemanticScholar, paper
+
+AUTHORS = 250
+PAPERS_PER_AUTHOR = 21
+
+
+class BulkCrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.pairs = [(f"Author{i} Smith", f"https://example.org/{i}") for i in range(AUTHORS)]
+        overrides_path = os.path.join(self.directory.name, 'author_id_overrides.json')
+        with open(overrides_path, 'w', encoding='utf-8') as f:
+            json.dump({name: str(i) for i, (name, _) in enumerate(self.pairs)}, f)
+        self.papers_by_author = {
+            str(i): [paper(f"{i}-{j}", f"2024-{j % 12 + 1:02d}-15") for j in range(PAPERS_PER_AUTHOR)]
+                     + [paper(f"{i}-old", '2019-06-01')]
+            for i in range(AUTHORS)
+        }
+
+        saved = (SemanticScholarScraper.fetch_engine_options, SemanticScholarScraper.fetch_engine,
+                 SemanticScholarScraper.author_id_resolver)
+        self.addCleanup(self._restore, *saved)
+        SemanticScholarScraper.author_id_resolver = AuthorIdResolver(
+            os.path.join(self.directory.name, 'author_ids.jsonl'), overrides_path=overrides_path)
+
+    @staticmethod
+    def _restore(options, engine, resolver):
+        SemanticScholarScraper.fetch_engine_options = options
+        SemanticScholarScraper.fetch_engine = engine
+        SemanticScholarScraper.author_id_resolver = resolver
+
+    def use_api(self, **options) -> FakeSemanticScholar:
+        api = FakeSemanticScholar(self.papers_by_author, **options)
+        SemanticScholarScraper.configure_fetch_engine(
+            session=api, cache=None, rate_limits={}, default_rate=100000.0, max_attempts=1)
+        return api
+
+    def crawl_in_bulk(self, max_attempts: int = 3) -> dict:
+        results = SemanticScholarScraper.iter_author_papers_in_bulk(
+            self.pairs, datetime(2024, 1, 1), datetime(2024, 12, 31), max_attempts=max_attempts)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return {pair: (result, error) for pair, result, error in results}
+
+    def test_authors_and_papers_are_fetched_in_batches(self):
+        api = self.use_api()
+        results = self.crawl_in_bulk()
+
+        author_batches = api.requests_to('author/batch')
+        paper_batches = api.requests_to('paper/batch')
+        self.assertEqual([len(ids) for _, ids in author_batches], [100, 100, 50])
+        self.assertEqual(sorted(len(ids) for _, ids in paper_batches), [250] + [500] * 10)
+        self.assertEqual(len(api.requests), 14)
+
+        for i, pair in enumerate(self.pairs):
+            (author_ids, papers, paper_ids), error = results[pair]
+            self.assertIsNone(error)
+            self.assertEqual(author_ids, [str(i)])
+            self.assertEqual(len(papers), PAPERS_PER_AUTHOR)
+            self.assertNotIn(f"{i}-old", paper_ids)
+
+    def test_paged_crawl_makes_a_request_per_author(self):
+        api = self.use_api()
+        results = SemanticScholarScraper.iter_author_papers(
+            self.pairs, datetime(2024, 1, 1), datetime(2024, 12, 31),
+            crawl=lambda pair: SemanticScholarScraper.crawl_author_incrementally(
+                pair[0], pair[1], datetime(2024, 1, 1), datetime(2024, 12, 31)))
+        self.assertEqual(sum(len(result[1]) for _, result, _ in results), AUTHORS * PAPERS_PER_AUTHOR)
+        self.assertEqual(len(api.requests), AUTHORS)
+
+    def test_failed_author_batch_only_fails_its_authors(self):
+        api = self.use_api(failing_ids={'150'})
+        results = self.crawl_in_bulk(max_attempts=1)
+
+        failed_ids = {author_id for _, ids in api.requests_to('author/batch') if '150' in ids for author_id in ids}
+        self.assertEqual(len(failed_ids), 100)
+        for i, pair in enumerate(self.pairs):
+            result, error = results[pair]
+            if str(i) in failed_ids:
+                self.assertIsNone(result)
+                self.assertIsNotNone(error)
+            else:
+                self.assertIsNone(error)
+                self.assertEqual(len(result[1]), PAPERS_PER_AUTHOR)
+
+    def test_failed_paper_batch_only_fails_the_authors_of_its_papers(self):
+        api = self.use_api(failing_ids={'7-3'})
+        results = self.crawl_in_bulk(max_attempts=1)
+
+        failed_batch = next(ids for _, ids in api.requests_to('paper/batch') if '7-3' in ids)
+        failed_authors = {paper_id.split('-')[0] for paper_id in failed_batch}
+        for i, pair in enumerate(self.pairs):
+            result, error = results[pair]
+            self.assertEqual(error is not None, str(i) in failed_authors)
+
+    def test_failed_authors_are_retried(self):
+        api = self.use_api(failing_ids={'150'}, failures=1)
+        results = self.crawl_in_bulk()
+
+        self.assertTrue(all(error is None for _, error in results.values()))
+        self.assertEqual(sum(len(result[1]) for result, _ in results.values()), AUTHORS * PAPERS_PER_AUTHOR)
+        # The retry only asks for the authors of the failed batch
+        self.assertEqual([len(ids) for _, ids in api.requests_to('author/batch')][-1], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from search import export
+from search.export import open_export, read_export
+
+
+class ExportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({'title': [f"paper {i}" for i in range(100)], 'year': np.arange(100)})
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.export_dir = self.directory.name
+
+    def test_evicted_export_is_written_again(self):
+        positions = np.arange(10)
+        with open_export(self.data, 'v1', positions, 'csv', self.export_dir) as f:
+            file_path = os.path.join(self.export_dir, os.listdir(self.export_dir)[0])
+        os.remove(file_path)
+        with open_export(self.data, 'v1', positions, 'csv', self.export_dir) as f:
+            self.assertEqual(len(pd.read_csv(f)), 10)
+        self.assertTrue(os.path.exists(file_path))
+
+    def test_open_export_survives_eviction(self):
+        with open_export(self.data, 'v1', np.arange(5), 'csv', self.export_dir) as f:
+            for name in os.listdir(self.export_dir):
+                os.remove(os.path.join(self.export_dir, name))
+            self.assertEqual(len(pd.read_csv(f)), 5)
+
+    def test_concurrent_exports_and_evictions(self):
+        def download(i):
+            positions = np.arange(i % 12 + 1)
+            return i % 12 + 1, read_export(self.data, 'v1', positions, 'csv', self.export_dir)
+
+        # Every new export evicts the others, so sessions keep losing their files to each other
+        with mock.patch.object(export, 'MAX_CACHED_EXPORTS', 1):
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(download, range(200)))
+        for rows, content in results:
+            self.assertEqual(content.decode('utf-8').count('\n'), rows + 1)
+        self.assertFalse([name for name in os.listdir(self.export_dir) if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
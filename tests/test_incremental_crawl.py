@@ -0,0 +1,72 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from scrapers.author_ids import AuthorIdResolver
+from scrapers.semantic_scholar_scraper.semantic_scholar_scraper import SemanticScholarScraper
+from tests.fake_semantic_scholar import FakeSemanticScholar, paper
+
+
+class IncrementalCrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        overrides_path = os.path.join(self.directory.name, 'author_id_overrides.json')
+        with open(overrides_path, 'w', encoding='utf-8') as f:
+            json.dump({'Ada Lovelace': ['1']}, f)
+
+        self.api = FakeSemanticScholar({'1': [paper('A', '2024-03-02'), paper('old', '2019-05-01')]})
+        saved = (SemanticScholarScraper.fetch_engine_options, SemanticScholarScraper.fetch_engine,
+                 SemanticScholarScraper.author_id_resolver)
+        self.addCleanup(self._restore, *saved)
+        SemanticScholarScraper.configure_fetch_engine(
+            session=self.api, cache=None, rate_limits={}, default_rate=1000.0, max_attempts=1)
+        SemanticScholarScraper.author_id_resolver = AuthorIdResolver(
+            os.path.join(self.directory.name, 'author_ids.jsonl'), overrides_path=overrides_path)
+
+    @staticmethod
+    def _restore(options, engine, resolver):
+        SemanticScholarScraper.fetch_engine_options = options
+        SemanticScholarScraper.fetch_engine = engine
+        SemanticScholarScraper.author_id_resolver = resolver
+
+    def crawl(self, end_date: datetime, bulk: bool = False) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            papers = SemanticScholarScraper.get_papers(
+                [('Ada Lovelace', 'https://example.org/ada')], datetime(2024, 1, 1), end_date,
+                os.path.join(self.directory.name, 'pkl'), bulk=bulk)
+        return sorted(info.link.rsplit('/', 1)[-1] for info in papers)
+
+    def check_late_indexed_paper(self, bulk: bool):
+        self.assertEqual(self.crawl(datetime(2024, 10, 1), bulk), ['A'])
+        # Published before the first crawl ended, indexed the day after it
+        self.api.papers_by_author['1'].append(paper('B', '2024-09-28'))
+        self.assertEqual(self.crawl(datetime(2024, 10, 2), bulk), ['B'])
+        self.assertEqual(self.crawl(datetime(2024, 10, 3), bulk), [])
+
+    def test_late_indexed_paper_is_returned_by_the_next_crawl(self):
+        self.check_late_indexed_paper(bulk=False)
+
+    def test_late_indexed_paper_is_returned_by_the_next_bulk_crawl(self):
+        self.check_late_indexed_paper(bulk=True)
+
+    def test_papers_outside_the_period_are_left_out(self):
+        self.api.papers_by_author['1'].append(paper('next-year', '2025-02-01'))
+        self.assertEqual(self.crawl(datetime(2024, 12, 31)), ['A'])
+
+    def test_non_incremental_crawl_returns_every_paper(self):
+        self.crawl(datetime(2024, 10, 1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            papers = SemanticScholarScraper.get_papers(
+                [('Ada Lovelace', 'https://example.org/ada')], datetime(2024, 1, 1), datetime(2024, 10, 2),
+                os.path.join(self.directory.name, 'pkl'), incremental=False)
+        self.assertEqual([info.title for info in papers], ['Paper A'])
+
+
+if __name__ == '__main__':
+    unittest.main()
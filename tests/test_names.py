@@ -0,0 +1,76 @@
+import unittest
+
+from scrapers.names import NameIndex, name_keys, same_author
+
+
+class NameKeysTest(unittest.TestCase):
+
+    def test_canonical_key_is_surname_and_first_initial(self):
+        self.assertEqual(name_keys('Wei Li'), ['li w'])
+        self.assertEqual(name_keys('Li, Wei'), ['li w'])
+        self.assertEqual(name_keys('J.R. Smith')[0], 'smith j')
+        self.assertEqual(name_keys('José Martínez'), ['martinez j'])
+
+    def test_two_word_surname_has_a_joined_variant(self):
+        self.assertEqual(name_keys('Ana Martínez López'), ['lopez a', 'martinezlopez a'])
+        self.assertEqual(name_keys('Ana Martínez-López'), ['martinezlopez a'])
+
+    def test_names_without_given_name_have_no_keys(self):
+        self.assertEqual(name_keys('Plato'), [])
+        self.assertEqual(name_keys(None), [])
+
+
+class SameAuthorTest(unittest.TestCase):
+
+    def test_swapped_names_match(self):
+        self.assertTrue(same_author('Wei Li', 'Li Wei'))
+        self.assertTrue(same_author('Li Wei', 'Wei Li'))
+
+    def test_swapped_names_must_match_in_full(self):
+        for first, second in [('Wei Li', 'Li Wang'), ('Wei Li', 'Li Wu'), ('Wei Li', 'Li Wen'),
+                              ('Ann Lee', 'Lee Anderson'), ('Wei Li', 'Wei Lin')]:
+            with self.subTest(first=first, second=second):
+                self.assertFalse(same_author(first, second))
+                self.assertFalse(same_author(second, first))
+
+    def test_initials_match_full_given_names(self):
+        self.assertTrue(same_author('W. Li', 'Wei Li'))
+        self.assertTrue(same_author('J.R. Smith', 'John Smith'))
+        self.assertFalse(same_author('W. Li', 'Li Wei'))
+
+    def test_hyphenated_and_spaced_surnames_match(self):
+        self.assertTrue(same_author('Ana Martínez-López', 'Ana Martinez Lopez'))
+        self.assertTrue(same_author('Ana Martinez Lopez', 'A. Martínez-López'))
+        self.assertTrue(same_author("Pat O'Brien", 'Pat OBrien'))
+        self.assertFalse(same_author('Ana Martínez-López', 'Ana Martinez'))
+
+
+class NameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex.from_records([
+            {'name': 'Wei Li', 'authorId': '1'},
+            {'name': 'Li Wei', 'authorId': '2'},
+            {'name': 'Li Wang', 'authorId': '3'},
+            {'name': 'Wei Lin', 'authorId': '4'},
+            {'name': 'W. Li', 'authorId': '5'},
+            {'name': 'Ana Martínez-López', 'authorId': '6'},
+            {'name': 'Lee Anderson', 'authorId': '7'},
+        ])
+
+    def test_lookup_finds_the_names_same_author_matches(self):
+        names = ['Wei Li', 'Li Wei', 'Li Wang', 'Wei Lin', 'W. Li', 'Ana Martínez-López', 'Lee Anderson']
+        for query in names + ['Ann Lee', 'Ana Martinez Lopez', 'Li Wu']:
+            with self.subTest(query=query):
+                expected = {str(i + 1) for i, name in enumerate(names) if same_author(query, name)}
+                self.assertEqual(set(self.index.lookup(query)), expected)
+
+    def test_lookup_returns_canonical_matches_first(self):
+        self.assertEqual(self.index.lookup('Wei Li'), ['1', '5', '2'])
+        self.assertEqual(self.index.lookup('Li Wei'), ['2', '1'])
+        self.assertEqual(self.index.lookup('Ana Martinez Lopez'), ['6'])
+        self.assertEqual(self.index.lookup('Ann Lee'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
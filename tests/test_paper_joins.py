@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from scrapers.paper_joins import factorize_together, join_paper_tables
+
+
+def merge_paper_tables(papers_df, authors_df, paper_authors_df, external_ids_df):
+    """The merges paper_collection.py ran before join_paper_tables, kept as the reference"""
+    papers_with_ids = papers_df.merge(external_ids_df, on="paperId", how="left")
+    paper_author_details = paper_authors_df.merge(authors_df, on="authorId", how="inner")
+    full_data = papers_with_ids.merge(paper_author_details, on="paperId", how="left")
+    authors_grouped = (
+        paper_authors_df.merge(authors_df, on="authorId", how="inner")
+        .groupby("paperId")["name"]
+        .apply(", ".join)
+        .reset_index()
+        .rename(columns={"name": "authors"})
+    )
+    papers_with_authors = papers_with_ids.merge(authors_grouped, on="paperId", how="left")
+    final_data_with_authors = papers_with_authors.merge(paper_author_details, on="paperId", how="left").drop_duplicates()
+    return full_data, final_data_with_authors
+
+
+def synthetic_tables(seed: int = 0, n_papers: int = 300, n_authors: int = 80) -> tuple:
+    rng = np.random.default_rng(seed)
+    paper_ids = [f"p{i}" for i in rng.integers(0, n_papers, n_papers)]  # Repeated paper IDs
+    papers_df = pd.DataFrame({
+        "paperId": paper_ids,
+        "title": [f"title {paper_id}" for paper_id in paper_ids],
+        "citationCount": rng.choice(["0", "3", "17", None], n_papers),
+    })
+    authors_df = pd.DataFrame({
+        "authorId": [f"a{i}" for i in range(n_authors)],
+        "name": [f"Author {i}" for i in range(n_authors)],
+    })
+    paper_authors_df = pd.DataFrame({
+        # Some links point to papers or authors missing from the other tables
+        "paperId": [f"p{i}" for i in rng.integers(0, n_papers + 20, 3 * n_papers)],
+        "authorId": [f"a{i}" for i in rng.integers(0, n_authors + 10, 3 * n_papers)],
+    })
+    external_ids_df = pd.DataFrame({
+        "paperId": [f"p{i}" for i in rng.integers(0, n_papers, n_papers // 2)],
+        "DOI": [f"10.1/{i}" for i in range(n_papers // 2)],
+        "ArXiv": rng.choice(["2401.00001", None], n_papers // 2),
+    })
+    return papers_df, authors_df, paper_authors_df, external_ids_df
+
+
+def sorted_rows(frame: pd.DataFrame) -> list:
+    """Rows as tuples in a canonical order, with missing values made comparable"""
+    return sorted(tuple("<NA>" if pd.isna(value) else str(value) for value in row)
+                  for row in frame.itertuples(index=False, name=None))
+
+
+class JoinPaperTablesTest(unittest.TestCase):
+    """
+    join_paper_tables returns the same rows as the merges it replaced. Row
+    order and the order of the names within ``authors`` may differ, so both
+    are compared order-insensitively.
+    """
+
+    def test_full_data_matches_merges(self):
+        for seed in range(5):
+            tables = synthetic_tables(seed)
+            expected, _ = merge_paper_tables(*tables)
+            full_data, _ = join_paper_tables(*tables)
+            with self.subTest(seed=seed):
+                self.assertEqual(list(full_data.columns), list(expected.columns))
+                self.assertEqual(sorted_rows(full_data), sorted_rows(expected))
+
+    def test_papers_with_authors_matches_merges(self):
+        def sort_author_names(frame):
+            names = frame["authors"].map(lambda value: value if pd.isna(value) else ", ".join(sorted(value.split(", "))))
+            return frame.assign(authors=names)
+
+        for seed in range(5):
+            tables = synthetic_tables(seed)
+            _, expected = merge_paper_tables(*tables)
+            _, papers_with_authors = join_paper_tables(*tables)
+            with self.subTest(seed=seed):
+                self.assertEqual(list(papers_with_authors.columns), list(expected.columns))
+                self.assertEqual(sorted_rows(sort_author_names(papers_with_authors)),
+                                 sorted_rows(sort_author_names(expected)))
+
+    def test_factorize_together(self):
+        first, second = factorize_together(pd.Series(["x", "y", None]), pd.Series(["y", "z", "x"]))
+        self.assertEqual(first[0], second[2])
+        self.assertEqual(first[1], second[0])
+        self.assertEqual(first[2], -1)
+        self.assertNotIn(second[1], first)
+
+
+if __name__ == '__main__':
+    unittest.main()
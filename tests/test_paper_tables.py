@@ -0,0 +1,47 @@
+"""
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from scrapers.paper_tables import iter_json_array
+
+
+class IterJsonArrayTest(unittest.TestCase):
+
+    def _parse(self, text: str, read_size: int) -> list:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'dump.json')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            return list(iter_json_array(file_path, read_size=read_size))
+
+    def test_every_read_boundary(self):
+        items = [-3.5, 1e-7, 12, "a, b]", {"papers": [{"paperId": "1", "citationCount": 2.25}]}, None, True, []]
+        for text in (json.dumps(items), json.dumps(items, indent=2)):
+            for read_size in range(1, len(text) + 1):
+                with self.subTest(text=text[:20], read_size=read_size):
+                    self.assertEqual(self._parse(text, read_size), items)
+
+    def test_number_cut_after_decimal_point(self):
+        self.assertEqual(self._parse('[-3.5]', read_size=4), [-3.5])
+        self.assertEqual(self._parse('[10e3, 2]', read_size=4), [10e3, 2])
+
+    def test_empty_array(self):
+        self.assertEqual(self._parse(' [ ] ', read_size=1), [])
+
+    def test_unclosed_array(self):
+        with self.assertRaises(ValueError):
+            self._parse('[1, 2', read_size=2)
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            self._parse('{"papers": []}', read_size=4)
+
+
+if __name__ == '__main__':
+    unittest.main()